@@ -1,5 +1,6 @@
 from mcp.server.fastmcp import FastMCP  # Import FastMCP, the quickstart server base
 from tools.arithmetic import add, subtract, multiply, divide  # Import arithmetic functions from tools.arithmetic
+from tools.batch import evaluate_batch  # Batch expression engine built on the same arithmetic
 
 mcp = FastMCP("Calculator Server")  # Initialize an MCP server instance with a descriptive name
 
@@ -24,6 +25,22 @@ def divide_tool(a: float, b: float) -> float:
     if b == 0:
         raise ValueError("Division by zero")
     return divide(a, b)
+
+@mcp.tool()
+def batch_tool(
+    expressions: list[str],
+    variables: dict[str, int | float | list[int | float]] | None = None,
+    reductions: list[str] | None = None,
+) -> list[dict]:
+    """
+    Evaluate many arithmetic expressions in one call. Expressions use + - * / // % **,
+    numbers, pi, e and the named variables; list variables are arrays and operations on
+    them apply element by element (e.g. "x * 1.1 - y"). Functions: abs, sqrt, round,
+    min, max, sum, mean, median, count and percentile(x, q). Elements that fail, such as
+    a division by zero, are null in the value and listed under errors with their index.
+    reductions (e.g. ["sum", "mean", "max", "p95"]) are applied to every array result.
+    """
+    return evaluate_batch(expressions, variables, reductions)  # Invalid variables or reductions raise ValueError
     
 if __name__ == "__main__":
     mcp.run(transport="stdio")  # Run the server, using standard input/output for communication
\ No newline at end of file
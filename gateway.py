@@ -0,0 +1,232 @@
+import time
+
+_STARTED = time.perf_counter()  # Taken before importing mcp so startup time includes it
+
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import sys
+from contextlib import AsyncExitStack, asynccontextmanager
+
+import mcp.types as types
+from mcp.server.lowlevel import Server
+from mcp.server.stdio import stdio_server
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Gateway: every MCP server of this repo in one process, imported on first use
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_PATH = os.path.join(BASE_DIR, "gateway_manifest.json")  # Tool list served before anything is imported
+SEPARATOR = "_"  # Tool names are <mount>_<tool>, e.g. calculator_add_tool or payrix_getTxns
+STATS_TOOL = "gateway_stats"
+
+# Mount name -> module holding a FastMCP instance named mcp, and the directory it imports from
+MOUNTS = {
+    "calculator": {"module": "calculator", "path": BASE_DIR},
+    "time": {"module": "time_tool", "path": BASE_DIR},
+    "joke": {"module": "joke_tool", "path": BASE_DIR},
+    "payrix": {"module": "mcp_server", "path": os.path.join(BASE_DIR, "payrix-py-mcp-server")},
+}
+
+# URI scheme -> mount whose resources are read through the gateway, e.g. the result pages
+# payrix_getTxns hands out as results://{handle}/page/{n} when a result is too large to inline
+RESOURCE_MOUNTS = {"results": "payrix"}
+RESOURCE_TEMPLATES = [
+    types.ResourceTemplate(
+        uriTemplate="results://{handle}/page/{n}",
+        name="payrix_result_page",
+        description="Page n (starting at 1) of a large Payrix tool result stored under handle.",
+    ),
+]
+
+logger = logging.getLogger("gateway")
+
+_servers = {}  # Mount name -> loaded FastMCP instance
+_import_ms = {}  # Mount name -> time its first tool call spent importing it
+_load_lock = asyncio.Lock()
+_ready_ms = None
+
+
+def _memory_mb():
+    """Returns (current RSS, peak RSS) in MB; either is None where the platform does not tell."""
+    current = peak = None
+    try:
+        with open("/proc/self/statm") as statm:
+            current = round(int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        peak = round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+    return current, peak
+
+
+def gateway_stats():
+    """Startup time, memory and per-mount import cost of this process."""
+    current, peak = _memory_mb()
+    return {
+        "startup_ms": _ready_ms,
+        "uptime_s": round(time.perf_counter() - _STARTED, 1),
+        "rss_mb": current,
+        "peak_rss_mb": peak,
+        "mounts": {
+            name: {"loaded": name in _servers, "import_ms": _import_ms.get(name)}
+            for name in MOUNTS
+        },
+    }
+
+
+def _import_mount(name):
+    # Synchronous import of a mounted server, timed for gateway_stats
+    if name in _servers:
+        return _servers[name]
+    spec = MOUNTS[name]
+    if spec["path"] not in sys.path:
+        sys.path.insert(0, spec["path"])
+    started = time.perf_counter()
+    module = importlib.import_module(spec["module"])
+    _import_ms[name] = round((time.perf_counter() - started) * 1000, 1)
+    _servers[name] = module.mcp
+    logger.info(f"Loaded {name} from {spec['module']} in {_import_ms[name]} ms")
+    return module.mcp
+
+
+async def _load(name, session):
+    """Imports a mount on first use and enters its lifespan for the current session."""
+    async with _load_lock:
+        backend = _import_mount(name)
+        if name not in session["entered"]:
+            # e.g. the Payrix server keeps its pooled HTTP client open through its lifespan
+            lowlevel = backend._mcp_server
+            await session["stack"].enter_async_context(lowlevel.lifespan(lowlevel))
+            session["entered"].add(name)
+    return backend
+
+
+async def build_manifest():
+    """Imports every mount and returns its tools under namespaced names."""
+    tools = []
+    for name in MOUNTS:
+        backend = _import_mount(name)
+        for tool in await backend.list_tools():
+            tool = tool.model_copy(update={"name": f"{name}{SEPARATOR}{tool.name}"})
+            tools.append(tool.model_dump(mode="json", by_alias=True, exclude_none=True))
+    return tools
+
+
+def _stats_tool():
+    return types.Tool(
+        name=STATS_TOOL,
+        description="Report the gateway's startup time, memory use and which servers have been loaded.",
+        inputSchema={"type": "object", "properties": {}},
+    )
+
+
+async def _load_manifest():
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        logger.warning(f"{MANIFEST_PATH} not found, importing every server to list tools")
+        return await build_manifest()
+
+
+@asynccontextmanager
+async def lifespan(server):
+    # Lifespans of the servers loaded during this session close with it
+    async with AsyncExitStack() as stack:
+        yield {"stack": stack, "entered": set()}
+
+
+server = Server("MCP Tools Gateway", lifespan=lifespan)
+_manifest = None
+
+
+@server.list_tools()
+async def list_tools() -> list[types.Tool]:
+    global _manifest
+    if _manifest is None:
+        _manifest = [types.Tool.model_validate(tool) for tool in await _load_manifest()]
+    return _manifest + [_stats_tool()]
+
+
+@server.call_tool()
+async def call_tool(name: str, arguments: dict):
+    if name == STATS_TOOL:
+        return gateway_stats()
+    mount, _, tool = name.partition(SEPARATOR)
+    if mount not in MOUNTS or not tool:
+        raise ValueError(f"Unknown tool: {name}")
+    backend = await _load(mount, server.request_context.lifespan_context)
+    # The backend reads the gateway's request context, so progress and logging still reach the client
+    return await backend.call_tool(tool, arguments)
+
+
+@server.list_resource_templates()
+async def list_resource_templates() -> list[types.ResourceTemplate]:
+    return RESOURCE_TEMPLATES
+
+
+@server.read_resource()
+async def read_resource(uri):
+    mount = RESOURCE_MOUNTS.get(uri.scheme)
+    if mount is None:
+        raise ValueError(f"Unknown resource: {uri}")
+    backend = await _load(mount, server.request_context.lifespan_context)
+    return await backend.read_resource(str(uri))
+
+
+async def serve():
+    global _ready_ms
+    async with stdio_server() as (read_stream, write_stream):
+        _ready_ms = round((time.perf_counter() - _STARTED) * 1000, 1)
+        current, peak = _memory_mb()
+        logger.info(f"Gateway ready in {_ready_ms} ms, RSS {current} MB (peak {peak} MB), "
+                    f"{len(MOUNTS)} servers mounted lazily")
+        await server.run(read_stream, write_stream, server.create_initialization_options())
+
+
+async def report(load_all=False):
+    """Prints startup time and memory, optionally after importing every server."""
+    global _ready_ms
+    _ready_ms = round((time.perf_counter() - _STARTED) * 1000, 1)
+    if load_all:
+        for name in MOUNTS:
+            _import_mount(name)
+    print(json.dumps(gateway_stats(), indent=2))
+
+
+async def write_manifest():
+    tools = await build_manifest()
+    with open(MANIFEST_PATH, "w") as f:
+        json.dump(tools, f, indent=2)
+        f.write("\n")
+    print(f"Wrote {len(tools)} tools to {MANIFEST_PATH}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Single-process gateway for the calculator, time, joke and Payrix MCP servers")
+    parser.add_argument("--write-manifest", action="store_true", help="Import every server and regenerate the tool manifest")
+    parser.add_argument("--report", action="store_true", help="Print startup time and memory as JSON and exit")
+    parser.add_argument("--load-all", action="store_true", help="With --report, import every server first")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    # stdout carries the MCP protocol, so logs go to stderr
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    if args.write_manifest:
+        asyncio.run(write_manifest())
+    elif args.report:
+        asyncio.run(report(load_all=args.load_all))
+    else:
+        asyncio.run(serve())
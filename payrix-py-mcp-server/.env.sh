@@ -5,4 +5,78 @@ export API_URL=""
 export API_TOKEN=""
 
 # MCP server configuration
-export MCP_SERVER_NAME="Payrix MCP Server"
\ No newline at end of file
+export MCP_SERVER_NAME="Payrix MCP Server"
+
+# HTTP client pool configuration
+export HTTP_MAX_CONNECTIONS="100"
+export HTTP_MAX_KEEPALIVE_CONNECTIONS="20"
+export HTTP_KEEPALIVE_EXPIRY="30"
+export HTTP_CONNECT_TIMEOUT="5"
+export HTTP_READ_TIMEOUT="30"
+export HTTP_WRITE_TIMEOUT="10"
+export HTTP_POOL_TIMEOUT="5"
+# Requires the 'h2' package (pip install httpx[http2])
+export HTTP2_ENABLED="false"
+
+# Response cache configuration (TTLs in seconds, 0 disables)
+export CACHE_MAX_ENTRIES="1024"
+export CACHE_TTL_MERCHANTS="300"
+export CACHE_TTL_TXNS="60"
+
+# Auto-pagination configuration (fetch_all mode)
+export PAGINATION_CONCURRENCY="4"
+export PAGINATION_PAGE_LIMIT="100"
+export PAGINATION_MAX_RECORDS="1000"
+
+# Bulk ID lookup configuration
+export BULK_ID_CHUNK_SIZE="50"
+export BULK_ID_MAX_IDS="500"
+export BULK_ID_FALLBACK_CONCURRENCY="8"
+
+# Maximum transactions scanned by aggregateTxns
+export AGGREGATE_MAX_RECORDS="50000"
+
+# Validate and canonicalize search expressions before sending them upstream
+export SEARCH_VALIDATION="true"
+
+# Local SQLite mirror (syncMirror / queryMirror)
+export MIRROR_ENABLED="false"
+export MIRROR_PATH="payrix_mirror.sqlite3"
+export MIRROR_MAX_STALENESS="300"
+export MIRROR_SYNC_MAX_RECORDS="100000"
+
+# Upstream request scheduler (rate limit in requests/second)
+export UPSTREAM_RATE_LIMIT="90"
+export UPSTREAM_BURST="50"
+export UPSTREAM_MAX_CONCURRENCY="32"
+export UPSTREAM_ENDPOINT_CONCURRENCY="16"
+export UPSTREAM_MAX_RETRIES="3"
+export UPSTREAM_BACKOFF_BASE="0.25"
+export UPSTREAM_BACKOFF_MAX="10"
+# Longest Retry-After waited out on a 429; longer ones return the 429
+export UPSTREAM_RETRY_AFTER_MAX="60"
+export CIRCUIT_FAILURE_THRESHOLD="5"
+export CIRCUIT_RESET_TIMEOUT="30"
+
+# HTTP serving (sse and http transports); values set on the container take precedence
+export MCP_HOST="${MCP_HOST:-127.0.0.1}"
+export MCP_PORT="${MCP_PORT:-8000}"
+export MCP_WORKERS="${MCP_WORKERS:-1}"
+export MCP_DRAIN_DELAY="${MCP_DRAIN_DELAY:-0}"
+export MCP_GRACEFUL_TIMEOUT="${MCP_GRACEFUL_TIMEOUT:-30}"
+
+# Result store for large getTxns results (results://{handle}/page/{n})
+export RESULTS_DIR="/tmp/payrix_results"
+export RESULTS_TTL="900"
+export RESULTS_MAX_BYTES="268435456"
+export RESULTS_SPILL_BYTES="262144"
+export RESULTS_PAGE_SIZE="100"
+export RESULTS_PREVIEW_ROWS="5"
+# Seconds between rescans of RESULTS_DIR for results written by other workers
+export RESULTS_SCAN_INTERVAL="60"
+
+# DNS rebinding protection of the sse/http transports: comma-separated Host headers
+# (e.g. "payrix.internal.example:*,10.0.0.5:*") and origins to accept. When unset, a
+# loopback bind only accepts loopback hosts and any other bind accepts every host.
+export MCP_ALLOWED_HOSTS="${MCP_ALLOWED_HOSTS:-}"
+export MCP_ALLOWED_ORIGINS="${MCP_ALLOWED_ORIGINS:-}"
@@ -17,11 +17,13 @@ show_help() {
     echo ""
     echo "Options for start:"
     echo "  --port=PORT       - Set the port (default: $DEFAULT_PORT)"
-    echo "  --transport=TYPE  - Set transport type: 'sse' or 'io' (default: sse)"
+    echo "  --transport=TYPE  - Set transport type: 'sse', 'io' or 'http' (default: sse)"
+    echo "  --workers=N       - Worker processes for the http transport (default: 1)"
     echo ""
     echo "Examples:"
     echo "  ./docker.sh build"
     echo "  ./docker.sh start --port=8080 --transport=sse"
+    echo "  ./docker.sh start --transport=http --workers=4"
     echo "  ./docker.sh stop"
     echo "  ./docker.sh clean"
 }
@@ -36,6 +38,7 @@ build() {
 start() {
     local port=$DEFAULT_PORT
     local transport="sse"
+    local workers=1
     
     # Parse arguments
     for arg in "$@"; do
@@ -46,12 +49,21 @@ start() {
             --transport=*)
             transport="${arg#*=}"
             ;;
+            --workers=*)
+            workers="${arg#*=}"
+            ;;
         esac
     done
     
     # Validate transport
-    if [[ "$transport" != "sse" && "$transport" != "io" ]]; then
-        echo "Error: Transport type must be 'sse' or 'io'"
+    if [[ "$transport" != "sse" && "$transport" != "io" && "$transport" != "http" ]]; then
+        echo "Error: Transport type must be 'sse', 'io' or 'http'"
+        exit 1
+    fi
+    
+    # Validate worker count
+    if ! [[ "$workers" =~ ^[1-9][0-9]*$ ]]; then
+        echo "Error: Workers must be a positive integer"
         exit 1
     fi
     
@@ -61,6 +73,12 @@ start() {
         docker run -d --name "$CONTAINER_NAME" -p "$port:8000" \
             -e TRANSPORT=sse \
             "$IMAGE_NAME"
+    elif [[ "$transport" == "http" ]]; then
+        # Stateless streamable HTTP; health at /healthz, readiness at /readyz
+        docker run -d --name "$CONTAINER_NAME" -p "$port:8000" \
+            -e TRANSPORT=http \
+            -e MCP_WORKERS="$workers" \
+            "$IMAGE_NAME"
     else
         # IO transport doesn't need port mapping
         docker run -d --name "$CONTAINER_NAME" \
@@ -0,0 +1,125 @@
+import json
+
+# Group-by dimensions supported by the transaction aggregation tool
+GROUP_BY_FIELDS = {
+    "merchant": lambda row: row.get("merchant"),
+    "status": lambda row: row.get("status"),
+    "type": lambda row: row.get("type"),
+    "currency": lambda row: row.get("currency"),
+    # created is 'YYYY-MM-DD HH:MM:SS.SSSS', the day is its date part
+    "created_day": lambda row: (row.get("created") or "")[:10] or None,
+}
+
+# Numeric txn fields that metrics can be computed over (amounts are in cents)
+METRIC_FIELDS = ("total", "refunded", "fee")
+METRIC_FUNCTIONS = ("sum", "avg", "min", "max")
+
+
+def parse_metrics(metrics):
+    """
+    Validates metric names such as 'count', 'sum_total' or 'avg_fee' and
+    returns them as (name, function, field) tuples.
+    """
+    parsed = []
+    for name in metrics:
+        name = name.strip()
+        if name == "count":
+            parsed.append((name, "count", None))
+            continue
+        func, _, field = name.partition("_")
+        if func not in METRIC_FUNCTIONS or field not in METRIC_FIELDS:
+            raise ValueError(
+                f"Unsupported metric '{name}'. Use 'count' or <{'|'.join(METRIC_FUNCTIONS)}>_<{'|'.join(METRIC_FIELDS)}>."
+            )
+        parsed.append((name, func, field))
+    return parsed
+
+
+def _group_value(value):
+    # Keep keys hashable even when the API returns nested objects
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True)
+    return value
+
+
+def _number(value):
+    if isinstance(value, bool) or value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class TxnAggregator:
+    """
+    Folds transaction rows into running per-group aggregates, so pages can be
+    discarded as soon as they have been added.
+    """
+
+    def __init__(self, group_by, metrics):
+        unknown = [field for field in group_by if field not in GROUP_BY_FIELDS]
+        if unknown:
+            raise ValueError(
+                f"Unsupported group_by field(s): {', '.join(unknown)}. Supported: {', '.join(GROUP_BY_FIELDS)}."
+            )
+        self.group_by = list(group_by)
+        self.metrics = parse_metrics(metrics or ["count"])
+        self.fields = sorted({field for _, _, field in self.metrics if field})
+        self._key_funcs = [GROUP_BY_FIELDS[field] for field in self.group_by]
+        # group key -> [row count, {field: [sum, count, min, max]}]
+        self._groups = {}
+        self.rows_scanned = 0
+
+    def add_rows(self, rows):
+        groups = self._groups
+        for row in rows:
+            if not isinstance(row, dict):
+                continue
+            self.rows_scanned += 1
+            key = tuple(_group_value(func(row)) for func in self._key_funcs)
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = [0, {field: [0, 0, None, None] for field in self.fields}]
+            group[0] += 1
+            for field, acc in group[1].items():
+                value = _number(row.get(field))
+                if value is None:
+                    continue
+                acc[0] += value
+                acc[1] += 1
+                if acc[2] is None or value < acc[2]:
+                    acc[2] = value
+                if acc[3] is None or value > acc[3]:
+                    acc[3] = value
+
+    def _metric_value(self, group, func, field):
+        if func == "count":
+            return group[0]
+        total, count, low, high = group[1][field]
+        if func == "sum":
+            return total
+        if func == "avg":
+            return round(total / count, 4) if count else None
+        if func == "min":
+            return low
+        return high
+
+    def summary(self):
+        """Returns the aggregates as a column header plus one value array per group."""
+        rows = []
+        for key in sorted(self._groups, key=lambda k: tuple("" if v is None else str(v) for v in k)):
+            group = self._groups[key]
+            rows.append(list(key) + [self._metric_value(group, func, field) for _, func, field in self.metrics])
+        return {
+            "columns": self.group_by + [name for name, _, _ in self.metrics],
+            "rows": rows,
+            "groups": len(rows),
+            "rows_scanned": self.rows_scanned,
+        }
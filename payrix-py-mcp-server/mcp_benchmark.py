@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the Payrix MCP server
+
+Runs the registered FastMCP tools through an in-memory MCP client session
+against a local fake Payrix API (an httpx.MockTransport with configurable
+latency, error rate and pagination) and reports per-scenario latency
+percentiles, throughput, allocations and peak RSS. Results are written to
+JSON so runs can be compared with --compare.
+
+peak_rss_mb is the peak of one scenario: on Linux the peak is reset through
+/proc/self/clear_refs before each scenario and read back from VmHWM. Where that
+is not possible it is null, and only process_peak_rss_mb (the peak since the
+process started, which carries over from earlier scenarios) is reported.
+
+    python mcp_benchmark.py --output bench.json
+    python mcp_benchmark.py --output new.json --compare bench.json
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import datetime
+import platform
+import tracemalloc
+
+import httpx
+from mcp.shared.memory import create_connected_server_and_client_session
+
+import mcp_server  # noqa: F401 - registers tools, resources and prompts
+from mcp_instance import mcp
+from mcp_common import install_http_client
+from mcp_cache import response_cache
+from mcp_resources import SCHEMA_REGISTRY
+from mcp_scheduler import upstream_scheduler
+from mcp_search import SearchError, parse_search
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+FAKE_BASE_URL = "http://fake-payrix.local"
+# Payrix caps page[limit] at 100
+FAKE_MAX_PAGE_LIMIT = 100
+BASE_DATE = datetime.datetime(2025, 8, 1)
+
+
+def _fake_value(field, spec, i, rng):
+    kind = spec.get('type')
+    if spec.get('format') == 'date-time':
+        return (BASE_DATE - datetime.timedelta(minutes=rng.randint(0, 90 * 24 * 60))).strftime('%Y-%m-%d %H:%M:%S.0000')
+    if spec.get('format') == 'yyyymmdd':
+        return int((BASE_DATE - datetime.timedelta(days=rng.randint(0, 3650))).strftime('%Y%m%d'))
+    if kind == 'integer':
+        return rng.randint(0, 1)
+    if kind == 'number':
+        return round(rng.uniform(0, 100), 2)
+    if kind == 'object':
+        return rng.randint(0, 5)
+    if kind == 'array':
+        return []
+    return f"{field}-{i}"
+
+
+class FakePayrix:
+    """
+    Serves generated /merchants and /txns payloads shaped like the real API,
+    including the 'response' envelope, page details, totals and search headers.
+    """
+
+    def __init__(self, merchants=200, txns=5000, latency_ms=50.0, jitter_ms=10.0, error_rate=0.0,
+                 rate_limit_rate=0.0, seed=7):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self.data = {
+            'merchants': [self._merchant(i) for i in range(merchants)],
+        }
+        merchant_ids = [row['id'] for row in self.data['merchants']]
+        self.data['txns'] = [self._txn(i, merchant_ids) for i in range(txns)]
+        self.index = {name: {row['id']: row for row in rows} for name, rows in self.data.items()}
+
+    def _row(self, resource, i):
+        return {field: _fake_value(field, spec, i, self._rng) for field, spec in SCHEMA_REGISTRY[resource].items()}
+
+    def _merchant(self, i):
+        row = self._row('merchants', i)
+        row.update(id=f"t1_mer_{i:020x}", dba=f"Merchant {i}", status=self._rng.randint(0, 6))
+        return row
+
+    def _txn(self, i, merchant_ids):
+        row = self._row('txns', i)
+        total = self._rng.randint(100, 100000)
+        row.update(
+            id=f"t1_txn_{i:020x}",
+            merchant=self._rng.choice(merchant_ids),
+            status=self._rng.randint(0, 4),
+            type=self._rng.randint(1, 5),
+            total=total,
+            fee=round(total * 0.029, 2),
+            refunded=total if self._rng.random() < 0.05 else 0,
+        )
+        return row
+
+    def _matches(self, row, conditions):
+        for field, operator, value in conditions:
+            actual = row.get(field)
+            if isinstance(actual, str) and len(actual) >= 10 and actual[4:5] == '-':
+                actual = actual[:10].replace('-', '')
+            text = '' if actual is None else str(actual)
+            if operator in ('equals', 'exact') and text != value:
+                return False
+            if operator == 'diff' and text == value:
+                return False
+            if operator == 'in' and text not in value.split(','):
+                return False
+            if operator == 'notin' and text in value.split(','):
+                return False
+            if operator in ('like', 'notlike'):
+                found = value.replace('%25', '').replace('%', '').lower() in text.lower()
+                if found != (operator == 'like'):
+                    return False
+            if operator in ('greater', 'less'):
+                try:
+                    left, right = float(text), float(value)
+                except ValueError:
+                    left, right = text, value
+                if (operator == 'greater' and not left > right) or (operator == 'less' and not left < right):
+                    return False
+        return True
+
+    def _envelope(self, data, page=None, totals=None):
+        details = {'requestId': self.requests}
+        if page:
+            details['page'] = page
+        if totals is not None:
+            details['totals'] = totals
+        return {'response': {'data': data, 'details': details, 'errors': []}}
+
+    async def handle(self, request):
+        self.requests += 1
+        delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+        roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            return httpx.Response(429, headers={'Retry-After': '1'}, text='Too Many Requests')
+        if roll < self.rate_limit_rate + self.error_rate:
+            return httpx.Response(503, text='Service Unavailable')
+
+        parts = request.url.path.strip('/').split('/')
+        resource = parts[0]
+        if resource not in self.data:
+            return httpx.Response(404, text='Not Found')
+        try:
+            conditions, _ = parse_search(resource, request.headers.get('search', ''))
+        except SearchError as e:
+            return httpx.Response(400, text=str(e))
+        conditions = [c for c in conditions if c[1] != 'sort']
+        if len(parts) > 1:
+            row = self.index[resource].get(parts[1])
+            data = [row] if row is not None and self._matches(row, conditions) else []
+            return httpx.Response(200, json=self._envelope(data))
+
+        rows = [row for row in self.data[resource] if self._matches(row, conditions)] if conditions else self.data[resource]
+        limit = int(request.url.params.get('page[limit]') or 10)
+        limit = min(max(limit, 1), FAKE_MAX_PAGE_LIMIT)
+        number = max(1, int(request.url.params.get('page[number]') or 1))
+        last = max(1, -(-len(rows) // limit))
+        page = rows[(number - 1) * limit:number * limit]
+        totals = {'count': len(rows)} if request.headers.get('totals') == 'true' else None
+        page_details = {'current': number, 'last': last, 'hasMore': number < last}
+        return httpx.Response(200, json=self._envelope(page, page_details, totals))
+
+
+def default_scenarios(fake):
+    """Each scenario calls one tool with arguments produced per call index."""
+    txn_ids = [row['id'] for row in fake.data['txns']]
+    merchant_ids = [row['id'] for row in fake.data['merchants']]
+    hot_merchants = merchant_ids[:5]
+    busy_merchant = fake.data['txns'][0]['merchant']
+    return [
+        {'name': 'getMerchantsId_hot', 'tool': 'getMerchantsId',
+         'args': lambda i: {'id': hot_merchants[i % len(hot_merchants)]}},
+        {'name': 'getTxnsId_cold', 'tool': 'getTxnsId',
+         'args': lambda i: {'id': txn_ids[i % len(txn_ids)], 'refresh': True}},
+        {'name': 'getTxns_page', 'tool': 'getTxns',
+         'args': lambda i: {'page_number_': 1 + i % 10, 'page_limit_': 100}},
+        {'name': 'getTxns_projected_compact', 'tool': 'getTxns',
+         'args': lambda i: {'page_number_': 1 + i % 10, 'page_limit_': 100,
+                            'fields': ['id', 'merchant', 'total', 'status'], 'compact': True}},
+        {'name': 'getTxns_fetch_all', 'tool': 'getTxns',
+         'args': lambda i: {'fetch_all': True, 'max_records_': 1000, 'fields': ['id', 'total']}},
+        {'name': 'getTxnsByIds_50', 'tool': 'getTxnsByIds',
+         'args': lambda i: {'ids': txn_ids[(i * 50) % len(txn_ids):(i * 50) % len(txn_ids) + 50]}},
+        {'name': 'aggregateTxns_merchant', 'tool': 'aggregateTxns',
+         'args': lambda i: {'search': f'merchant[equals]={busy_merchant}',
+                            'group_by': ['status'], 'metrics': ['count', 'sum_total']}},
+        {'name': 'getTxns_page_errors', 'tool': 'getTxns', 'error_rate': 0.1,
+         'args': lambda i: {'page_number_': 1 + i % 10, 'page_limit_': 100}},
+    ]
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100
+    low = int(k)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (k - low)
+
+
+def _process_peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def _reset_peak_rss():
+    """Resets the peak RSS to the current RSS (Linux only); returns whether it worked."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb():
+    # VmHWM is the peak RSS since the last reset
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _is_error(result):
+    if result.isError:
+        return True
+    text = ''.join(getattr(block, 'text', '') for block in result.content)
+    return text.startswith(('API Error:', 'Error:'))
+
+
+async def _run_calls(session, tool, make_args, iterations, concurrency):
+    latencies = []
+    errors = 0
+    counter = iter(range(iterations))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            result = await session.call_tool(tool, make_args(i))
+            latencies.append((time.perf_counter() - started) * 1000)
+            if _is_error(result):
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def run_scenario(session, fake, scenario, iterations, concurrency, allocation_calls, base_error_rate):
+    fake.error_rate = scenario.get('error_rate', base_error_rate)
+    response_cache.invalidate()
+    upstream_scheduler.breaker.record_success()
+    requests_before = fake.requests
+    peak_reset = _reset_peak_rss()
+
+    # Warm up once so imports and first-call setup are not measured
+    await session.call_tool(scenario['tool'], scenario['args'](0))
+    latencies, errors, wall = await _run_calls(session, scenario['tool'], scenario['args'], iterations, concurrency)
+    upstream_requests = fake.requests - requests_before
+
+    alloc = {}
+    if allocation_calls > 0:
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        await _run_calls(session, scenario['tool'], scenario['args'], allocation_calls, 1)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        alloc = {
+            'alloc_peak_kb': round(peak / 1024, 1),
+            'alloc_retained_kb_per_call': round((current - before) / 1024 / allocation_calls, 2),
+        }
+
+    latencies.sort()
+    return dict({
+        'scenario': scenario['name'],
+        'tool': scenario['tool'],
+        'calls': len(latencies),
+        'errors': errors,
+        'concurrency': concurrency,
+        'error_rate': fake.error_rate,
+        'p50_ms': round(_percentile(latencies, 50), 2),
+        'p95_ms': round(_percentile(latencies, 95), 2),
+        'p99_ms': round(_percentile(latencies, 99), 2),
+        'mean_ms': round(sum(latencies) / len(latencies), 2),
+        'max_ms': round(latencies[-1], 2),
+        'throughput_rps': round(len(latencies) / wall, 2) if wall else None,
+        'upstream_requests': upstream_requests,
+        'peak_rss_mb': _peak_rss_mb() if peak_reset else None,
+        'process_peak_rss_mb': _process_peak_rss_mb(),
+    }, **alloc)
+
+
+async def run_benchmark(args):
+    fake = FakePayrix(merchants=args.merchants, txns=args.txns, latency_ms=args.latency_ms,
+                      jitter_ms=args.jitter_ms, error_rate=args.error_rate, seed=args.seed)
+    # The benchmark measures the server, not the production rate limit
+    upstream_scheduler.bucket.rate = args.rate_limit
+    upstream_scheduler.backoff_base = min(upstream_scheduler.backoff_base, 0.05)
+    scenarios = [s for s in default_scenarios(fake) if not args.scenario or s['name'] in args.scenario]
+    install_http_client(httpx.AsyncClient(base_url=FAKE_BASE_URL, transport=httpx.MockTransport(fake.handle)))
+
+    results = []
+    async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+        for scenario in scenarios:
+            result = await run_scenario(session, fake, scenario, args.iterations, args.concurrency,
+                                        args.allocation_calls, args.error_rate)
+            print(f"{result['scenario']:<28} p50 {result['p50_ms']:>8.1f} ms  p95 {result['p95_ms']:>8.1f} ms  "
+                  f"p99 {result['p99_ms']:>8.1f} ms  {result['throughput_rps']:>8.1f} calls/s  "
+                  f"errors {result['errors']}")
+            results.append(result)
+    return {
+        'meta': {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'config': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')},
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Prints p95 and throughput deltas per scenario and returns the regressed scenario names."""
+    previous = {r['scenario']: r for r in baseline.get('results', [])}
+    regressions = []
+    for result in current['results']:
+        old = previous.get(result['scenario'])
+        if not old:
+            continue
+        p95_delta = (result['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100 if old['p95_ms'] else 0.0
+        rps_delta = ((result['throughput_rps'] - old['throughput_rps']) / old['throughput_rps'] * 100
+                     if old.get('throughput_rps') else 0.0)
+        regressed = p95_delta > threshold or rps_delta < -threshold
+        if regressed:
+            regressions.append(result['scenario'])
+        print(f"{result['scenario']:<28} p95 {p95_delta:+7.1f}%  throughput {rps_delta:+7.1f}%"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark the Payrix MCP tools against a fake Payrix API")
+    parser.add_argument("--iterations", type=int, default=200, help="Measured calls per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent tool calls per scenario")
+    parser.add_argument("--scenario", action="append", help="Only run this scenario (repeatable)")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Fake upstream latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="Uniform +/- jitter on the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of upstream requests failing with 503")
+    parser.add_argument("--merchants", type=int, default=200, help="Generated merchants")
+    parser.add_argument("--txns", type=int, default=5000, help="Generated transactions")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Scheduler rate limit in req/s, 0 disables it")
+    parser.add_argument("--allocation-calls", type=int, default=20,
+                        help="Extra sequential calls traced with tracemalloc, 0 skips allocation tracking")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed for the generated data")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    # Per-request INFO logs would dominate the measurement
+    logging.disable(logging.INFO)
+    report = asyncio.run(run_benchmark(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
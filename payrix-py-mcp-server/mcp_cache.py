@@ -0,0 +1,119 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+
+# Response cache configuration
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "1024"))
+# Per-resource TTLs in seconds, 0 disables caching for that resource
+CACHE_TTLS = {
+    "merchants": float(os.environ.get("CACHE_TTL_MERCHANTS", "300")),
+    "txns": float(os.environ.get("CACHE_TTL_TXNS", "60")),
+}
+
+
+class ResponseCache:
+    """
+    Size-bounded LRU cache of upstream responses with per-entry TTLs.
+    Concurrent lookups of the same key share a single in-flight fetch.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttls=None):
+        self.max_entries = max_entries
+        self.ttls = dict(CACHE_TTLS if ttls is None else ttls)
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}  # key -> asyncio.Task
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.bypasses = 0
+
+    def ttl_for(self, resource):
+        return self.ttls.get(resource, 0)
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key, value, ttl):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_fetch(self, key, resource, fetch, refresh=False, cacheable=None):
+        """
+        Returns the cached value for key, or awaits fetch() and caches its result
+        for the TTL of the given resource type. With refresh=True the cached value
+        is ignored and replaced by a fresh upstream response.
+        """
+        ttl = self.ttl_for(resource)
+        if ttl <= 0 or self.max_entries <= 0:
+            return await fetch()
+        if refresh:
+            self.bypasses += 1
+        else:
+            value = self._lookup(key)
+            if value is not None:
+                self.hits += 1
+                return value
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task)
+        self.misses += 1
+        task = asyncio.ensure_future(fetch())
+        self._inflight[key] = task
+
+        def _on_done(done):
+            if self._inflight.get(key) is done:
+                del self._inflight[key]
+            if done.cancelled() or done.exception() is not None:
+                return
+            value = done.result()
+            if cacheable is None or cacheable(value):
+                self._store(key, value, ttl)
+
+        task.add_done_callback(_on_done)
+        # Shield so one cancelled caller does not cancel the fetch for everyone else
+        return await asyncio.shield(task)
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "inflight": len(self._inflight),
+            "ttls": self.ttls,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "bypasses": self.bypasses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
+
+
+def cache_key(url, search=''):
+    return f"{url}|{search or ''}"
+
+
+response_cache = ResponseCache()
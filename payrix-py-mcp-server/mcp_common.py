@@ -1,17 +1,149 @@
 import os
+import json
+import time
+import logging
 import httpx
+from mcp_metrics import add_phase_time
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib codec is used without it
+    orjson = None
 
 # API configuration (import or redefine as needed)
 API_URL = os.environ.get("API_URL", "")
 API_TOKEN = os.environ.get("API_TOKEN", "")
 
-async def get_http_client():
+# HTTP client pool configuration
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", "30"))
+HTTP_WRITE_TIMEOUT = float(os.environ.get("HTTP_WRITE_TIMEOUT", "10"))
+HTTP_POOL_TIMEOUT = float(os.environ.get("HTTP_POOL_TIMEOUT", "5"))
+HTTP2_ENABLED = os.environ.get("HTTP2_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Validate and canonicalize search expressions locally before sending them upstream
+SEARCH_VALIDATION = os.environ.get("SEARCH_VALIDATION", "true").lower() in ("1", "true", "yes")
+
+# Auto-pagination configuration (fetch_all mode of the list tools)
+PAGINATION_CONCURRENCY = int(os.environ.get("PAGINATION_CONCURRENCY", "4"))
+PAGINATION_PAGE_LIMIT = int(os.environ.get("PAGINATION_PAGE_LIMIT", "100"))
+PAGINATION_MAX_RECORDS = int(os.environ.get("PAGINATION_MAX_RECORDS", "1000"))
+AGGREGATE_MAX_RECORDS = int(os.environ.get("AGGREGATE_MAX_RECORDS", "50000"))
+
+# Local SQLite mirror configuration (syncMirror / queryMirror)
+MIRROR_ENABLED = os.environ.get("MIRROR_ENABLED", "false").lower() in ("1", "true", "yes")
+MIRROR_PATH = os.environ.get("MIRROR_PATH", "payrix_mirror.sqlite3")
+MIRROR_MAX_STALENESS = int(os.environ.get("MIRROR_MAX_STALENESS", "300"))
+MIRROR_SYNC_MAX_RECORDS = int(os.environ.get("MIRROR_SYNC_MAX_RECORDS", "100000"))
+
+# Bulk ID lookup configuration (getMerchantsByIds / getTxnsByIds)
+BULK_ID_CHUNK_SIZE = int(os.environ.get("BULK_ID_CHUNK_SIZE", "50"))
+BULK_ID_MAX_IDS = int(os.environ.get("BULK_ID_MAX_IDS", "500"))
+BULK_ID_FALLBACK_CONCURRENCY = int(os.environ.get("BULK_ID_FALLBACK_CONCURRENCY", "8"))
+
+logger = logging.getLogger(__name__)
+
+
+def json_loads(data):
+    """Parses JSON with orjson when installed. Both codecs raise ValueError subclasses."""
+    started = time.perf_counter()
+    try:
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+    finally:
+        add_phase_time("parse", time.perf_counter() - started)
+
+
+def json_dumps(obj):
+    """Serializes to a compact JSON string, with orjson when installed."""
+    started = time.perf_counter()
+    try:
+        if orjson is not None:
+            return orjson.dumps(obj).decode()
+        return json.dumps(obj, separators=(',', ':'))
+    finally:
+        add_phase_time("serialize", time.perf_counter() - started)
+
+# Process-wide client shared by every tool call, plus the number of open lifespans using it
+_http_client = None
+_http_client_users = 0
+
+
+def _http2_available():
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _build_http_client():
     headers = {
         "Content-Type": "application/json",
         "Accept": "application/json",
         "APIKey": API_TOKEN
     }
+    http2 = HTTP2_ENABLED
+    if http2 and not _http2_available():
+        logger.warning("HTTP2_ENABLED is set but the 'h2' package is not installed; using HTTP/1.1")
+        http2 = False
     return httpx.AsyncClient(
         base_url=API_URL,
-        headers=headers
+        headers=headers,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            connect=HTTP_CONNECT_TIMEOUT,
+            read=HTTP_READ_TIMEOUT,
+            write=HTTP_WRITE_TIMEOUT,
+            pool=HTTP_POOL_TIMEOUT,
+        ),
     )
+
+
+async def get_http_client():
+    """
+    Returns the shared pooled client. The client is created lazily, so tools
+    also work when called outside of the server lifespan.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = _build_http_client()
+    return _http_client
+
+
+def install_http_client(client):
+    """
+    Replaces the shared client, e.g. with one using an httpx.MockTransport
+    for benchmarks. Returns the previous client, which is not closed.
+    """
+    global _http_client
+    previous, _http_client = _http_client, client
+    return previous
+
+
+async def open_http_client():
+    """Registers a lifespan user of the shared client, creating it if needed."""
+    global _http_client_users
+    _http_client_users += 1
+    return await get_http_client()
+
+
+async def close_http_client():
+    """
+    Releases a lifespan user of the shared client. The connection pool is only
+    closed once the last user is gone, since SSE runs one lifespan per session.
+    """
+    global _http_client, _http_client_users
+    _http_client_users = max(0, _http_client_users - 1)
+    if _http_client_users == 0 and _http_client is not None:
+        client, _http_client = _http_client, None
+        await client.aclose()
@@ -0,0 +1,164 @@
+import os
+import signal
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+from mcp.server.transport_security import TransportSecuritySettings
+from mcp_instance import mcp
+# Worker processes only import this module, so it registers the tools, resources and prompts itself
+import mcp_tools  # noqa: F401
+import mcp_resources  # noqa: F401
+import mcp_prompts  # noqa: F401
+from mcp_common import open_http_client, close_http_client
+from mcp_cache import response_cache
+from mcp_metrics import render_prometheus
+from mcp_results import result_store
+from mcp_scheduler import upstream_scheduler, UPSTREAM_RATE_LIMIT, UPSTREAM_BURST
+
+# HTTP serving configuration (sse and streamable-http transports)
+MCP_HOST = os.environ.get("MCP_HOST", "127.0.0.1")
+MCP_PORT = int(os.environ.get("MCP_PORT", "8000"))
+MCP_WORKERS = int(os.environ.get("MCP_WORKERS", "1"))
+# Seconds to keep serving with /readyz failing after SIGTERM, so load balancers stop routing first
+MCP_DRAIN_DELAY = float(os.environ.get("MCP_DRAIN_DELAY", "0"))
+# Seconds in-flight requests get to finish once the listener is closed
+MCP_GRACEFUL_TIMEOUT = float(os.environ.get("MCP_GRACEFUL_TIMEOUT", "30"))
+# Host headers (e.g. 'payrix.internal.example:*') and origins accepted with DNS rebinding
+# protection on; without them the protection only covers loopback binds
+MCP_ALLOWED_HOSTS = [h.strip() for h in os.environ.get("MCP_ALLOWED_HOSTS", "").split(",") if h.strip()]
+MCP_ALLOWED_ORIGINS = [o.strip() for o in os.environ.get("MCP_ALLOWED_ORIGINS", "").split(",") if o.strip()]
+
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+logger = logging.getLogger(__name__)
+
+_draining = False
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def prometheus_metrics(request: Request) -> PlainTextResponse:
+    """Prometheus scrape endpoint. With several workers each scrape reports one worker."""
+    body = render_prometheus({
+        "cache": response_cache.stats(),
+        "scheduler": upstream_scheduler.stats(),
+        "results": result_store.stats(),
+    })
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
+@mcp.custom_route("/healthz", methods=["GET"])
+async def health(request: Request) -> JSONResponse:
+    """Liveness: the worker's event loop is answering."""
+    return JSONResponse({"status": "ok", "pid": os.getpid()})
+
+
+@mcp.custom_route("/readyz", methods=["GET"])
+async def readiness(request: Request) -> JSONResponse:
+    """Readiness: fails with 503 once the worker has started draining."""
+    body = {
+        "status": "draining" if _draining else "ready",
+        "pid": os.getpid(),
+        "circuit_state": upstream_scheduler.breaker.state,
+    }
+    return JSONResponse(body, status_code=503 if _draining else 200)
+
+
+def _install_drain_handler():
+    # Runs inside the worker after uvicorn installed its own SIGTERM handler. The
+    # wrapper flips readiness right away and hands the signal on to uvicorn, which
+    # closes the listener and waits for in-flight requests, after MCP_DRAIN_DELAY.
+    if threading.current_thread() is not threading.main_thread():
+        return
+    previous = signal.getsignal(signal.SIGTERM)
+    if not callable(previous):
+        return
+    loop = asyncio.get_running_loop()
+
+    def handle_sigterm(signum, frame):
+        global _draining
+        if _draining or MCP_DRAIN_DELAY <= 0:
+            _draining = True
+            previous(signum, frame)
+            return
+        _draining = True
+        logger.info(f"Draining worker {os.getpid()} for {MCP_DRAIN_DELAY:.0f}s before shutdown")
+        loop.call_soon_threadsafe(loop.call_later, MCP_DRAIN_DELAY, previous, signum, frame)
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+
+def configure_transport_security(host):
+    """
+    Sets the DNS rebinding protection of the HTTP transports for the bind address.
+    MCP_ALLOWED_HOSTS/MCP_ALLOWED_ORIGINS restrict the accepted Host and Origin headers;
+    without them a loopback bind only accepts loopback hosts and any other bind (a
+    container behind a load balancer) accepts every host.
+    """
+    if MCP_ALLOWED_HOSTS:
+        security = TransportSecuritySettings(
+            enable_dns_rebinding_protection=True,
+            allowed_hosts=MCP_ALLOWED_HOSTS,
+            allowed_origins=MCP_ALLOWED_ORIGINS,
+        )
+    elif host in LOOPBACK_HOSTS:
+        security = TransportSecuritySettings(
+            enable_dns_rebinding_protection=True,
+            allowed_hosts=["127.0.0.1:*", "localhost:*", "[::1]:*"],
+            allowed_origins=["http://127.0.0.1:*", "http://localhost:*", "http://[::1]:*"],
+        )
+    else:
+        security = TransportSecuritySettings(enable_dns_rebinding_protection=False)
+    mcp.settings.transport_security = security
+
+
+def create_http_app():
+    """
+    Builds the stateless streamable-HTTP ASGI app for one worker. Every request is
+    self-contained, so any worker behind a load balancer can serve any request.
+    """
+    mcp.settings.stateless_http = True
+    configure_transport_security(os.environ.get("MCP_HOST", MCP_HOST))
+    app = mcp.streamable_http_app()
+    # Each worker has its own token bucket, so split the upstream rate limit between them
+    workers = max(1, int(os.environ.get("MCP_WORKERS", MCP_WORKERS)))
+    upstream_scheduler.bucket.rate = UPSTREAM_RATE_LIMIT / workers
+    upstream_scheduler.bucket.burst = max(1, UPSTREAM_BURST // workers)
+    session_manager_lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app):
+        # Stateless mode enters the server lifespan once per request; holding a
+        # reference for the worker's lifetime keeps the connection pool warm
+        await open_http_client()
+        _install_drain_handler()
+        try:
+            async with session_manager_lifespan(app):
+                yield
+        finally:
+            await close_http_client()
+
+    app.router.lifespan_context = lifespan
+    return app
+
+
+def run_http(host=MCP_HOST, port=MCP_PORT, workers=MCP_WORKERS):
+    """Serves the streamable-HTTP app with uvicorn across the given number of worker processes."""
+    import uvicorn
+
+    # Workers read the count (to split the rate limit) and bind host from the environment
+    os.environ["MCP_WORKERS"] = str(workers)
+    os.environ["MCP_HOST"] = host
+    options = dict(
+        host=host,
+        port=port,
+        timeout_graceful_shutdown=MCP_GRACEFUL_TIMEOUT,
+        log_level=mcp.settings.log_level.lower(),
+    )
+    if workers > 1:
+        # Worker processes import the app themselves, so it is passed by name
+        uvicorn.run("mcp_http:create_http_app", factory=True, workers=workers, **options)
+    else:
+        uvicorn.run(create_http_app(), **options)
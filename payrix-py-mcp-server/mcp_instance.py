@@ -1,4 +1,17 @@
 import os
+from contextlib import asynccontextmanager
 from mcp.server.fastmcp import FastMCP
+from mcp_common import open_http_client, close_http_client
 
-mcp = FastMCP(name=os.environ.get("MCP_SERVER_NAME", "Payrix API"))
+
+@asynccontextmanager
+async def lifespan(server):
+    # Keep one pooled HTTP client alive for as long as the server is running
+    await open_http_client()
+    try:
+        yield {}
+    finally:
+        await close_http_client()
+
+
+mcp = FastMCP(name=os.environ.get("MCP_SERVER_NAME", "Payrix API"), lifespan=lifespan)
@@ -0,0 +1,180 @@
+import time
+import bisect
+import functools
+import contextvars
+
+# Histogram bucket upper bounds, in seconds for durations and bytes for sizes
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+# upstream: time spent in Payrix requests (summed over concurrent requests of a call),
+# parse/serialize: time spent in JSON decoding/encoding inside the tool
+PHASES = ("total", "upstream", "parse", "serialize")
+
+METRIC_PREFIX = "payrix_mcp"
+
+# Phase timings of the tool call running in the current context
+_call_phases = contextvars.ContextVar("tool_call_phases", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self):
+        buckets, running = {}, 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            running += count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = running
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "avg": round(self.sum / self.count, 6) if self.count else 0.0,
+            "buckets": buckets,
+        }
+
+
+class ToolStats:
+    __slots__ = ("calls", "errors", "phases", "response_bytes")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = {}
+        self.phases = {phase: Histogram(DURATION_BUCKETS) for phase in PHASES}
+        self.response_bytes = Histogram(SIZE_BUCKETS)
+
+
+_tools = {}
+
+
+def add_phase_time(phase, seconds):
+    """Adds time to a phase of the current tool call; a no-op outside instrumented calls."""
+    phases = _call_phases.get()
+    if phases is not None:
+        phases[phase] += seconds
+
+
+def classify_error(result):
+    """Maps a tool result string to an error class, or None for a successful result."""
+    if not isinstance(result, str):
+        return None
+    if result.startswith("API Error: "):
+        return f"upstream_{result[11:14]}"
+    if result.startswith("Error: "):
+        if result.startswith("Error: Invalid search"):
+            return "invalid_search"
+        if "circuit breaker is open" in result:
+            return "circuit_open"
+        return "error"
+    return None
+
+
+def _record(name, phases, result=None, exception=None):
+    stats = _tools.get(name)
+    if stats is None:
+        stats = _tools[name] = ToolStats()
+    stats.calls += 1
+    for phase, seconds in phases.items():
+        stats.phases[phase].observe(seconds)
+    error = type(exception).__name__ if exception is not None else classify_error(result)
+    if error:
+        stats.errors[error] = stats.errors.get(error, 0) + 1
+    if isinstance(result, str):
+        stats.response_bytes.observe(len(result.encode("utf-8")))
+
+
+def instrumented(func):
+    """
+    Records call count, per-phase latency, response size and error class of an
+    async tool. Apply below @mcp.tool so FastMCP still sees the original signature.
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        phases = {"upstream": 0.0, "parse": 0.0, "serialize": 0.0}
+        token = _call_phases.set(phases)
+        started = time.perf_counter()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            phases["total"] = time.perf_counter() - started
+            _record(name, phases, exception=e)
+            raise
+        finally:
+            _call_phases.reset(token)
+        phases["total"] = time.perf_counter() - started
+        _record(name, phases, result=result)
+        return result
+
+    return wrapper
+
+
+def metrics_snapshot():
+    """Returns all tool metrics as a JSON-friendly dict."""
+    return {
+        name: {
+            "calls": stats.calls,
+            "errors": dict(stats.errors),
+            "latency_seconds": {phase: hist.snapshot() for phase, hist in stats.phases.items()},
+            "response_bytes": stats.response_bytes.snapshot(),
+        }
+        for name, stats in sorted(_tools.items())
+    }
+
+
+def _histogram_lines(metric, labels, hist):
+    lines = []
+    running = 0
+    for bound, count in zip(hist.bounds + (float("inf"),), hist.counts):
+        running += count
+        le = "+Inf" if bound == float("inf") else repr(bound)
+        lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {running}')
+    lines.append(f"{metric}_sum{{{labels}}} {hist.sum}")
+    lines.append(f"{metric}_count{{{labels}}} {hist.count}")
+    return lines
+
+
+def render_prometheus(gauges=None):
+    """
+    Renders tool metrics in the Prometheus text exposition format. gauges maps a
+    subsystem name (e.g. 'cache') to a dict of numeric values exported as gauges.
+    """
+    calls = f"{METRIC_PREFIX}_tool_calls_total"
+    errors = f"{METRIC_PREFIX}_tool_errors_total"
+    duration = f"{METRIC_PREFIX}_tool_duration_seconds"
+    size = f"{METRIC_PREFIX}_tool_response_bytes"
+    lines = [
+        f"# HELP {calls} Tool calls.", f"# TYPE {calls} counter",
+    ]
+    for name, stats in sorted(_tools.items()):
+        lines.append(f'{calls}{{tool="{name}"}} {stats.calls}')
+    lines += [f"# HELP {errors} Failed tool calls by error class.", f"# TYPE {errors} counter"]
+    for name, stats in sorted(_tools.items()):
+        for error, count in sorted(stats.errors.items()):
+            lines.append(f'{errors}{{tool="{name}",class="{error}"}} {count}')
+    lines += [f"# HELP {duration} Tool latency by phase.", f"# TYPE {duration} histogram"]
+    for name, stats in sorted(_tools.items()):
+        for phase, hist in stats.phases.items():
+            lines += _histogram_lines(duration, f'tool="{name}",phase="{phase}"', hist)
+    lines += [f"# HELP {size} Tool response size.", f"# TYPE {size} histogram"]
+    for name, stats in sorted(_tools.items()):
+        lines += _histogram_lines(size, f'tool="{name}"', stats.response_bytes)
+    for subsystem, values in (gauges or {}).items():
+        for key, value in sorted(values.items()):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            metric = f"{METRIC_PREFIX}_{subsystem}_{key}"
+            lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+    return "\n".join(lines) + "\n"
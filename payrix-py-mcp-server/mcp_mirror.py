@@ -0,0 +1,208 @@
+import json
+import time
+import sqlite3
+import threading
+from mcp_resources import SCHEMA_REGISTRY
+from mcp_search import LIST_OPERATORS, PATTERN_OPERATORS, SORT_OPERATOR
+
+# Fields copied into their own indexed columns, everything else is read from the JSON row
+INDEXED_FIELDS = {
+    "merchants": ("entity", "status"),
+    "txns": ("merchant", "status"),
+}
+
+
+def _day(value):
+    # 'YYYY-MM-DD HH:MM:SS.SSSS' -> 'YYYYMMDD', the format search values use
+    return value[:10].replace('-', '') if isinstance(value, str) and value else None
+
+
+def _param(value, spec):
+    # Strings (date-time fields included, compared as YYYYMMDD text) stay text, the rest
+    # is bound as a number so it matches the JSON-typed values SQLite extracts
+    kind = (spec or {}).get('type')
+    if kind == 'string':
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    if kind == 'number':
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return value
+
+
+class LocalMirror:
+    """
+    SQLite copy of Payrix merchants and transactions, kept current by upserting
+    rows fetched with a modified[greater] watermark and queried with the same
+    search conditions the tools accept. Methods block, so call them from a thread.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            for resource, indexed in INDEXED_FIELDS.items():
+                columns = ''.join(f", {field}" for field in indexed)
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {resource} "
+                    f"(id TEXT PRIMARY KEY, created_day TEXT, modified TEXT{columns}, data TEXT NOT NULL)"
+                )
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS {resource}_created ON {resource}(created_day)")
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS {resource}_modified ON {resource}(modified)")
+                for field in indexed:
+                    self._conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS {resource}_{field} ON {resource}({field}, created_day)"
+                    )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state "
+                "(resource TEXT PRIMARY KEY, synced_at REAL, rows_synced INTEGER, watermark TEXT, "
+                "complete INTEGER, complete_at REAL)"
+            )
+            # Mirrors created before completeness was tracked lack the last two columns
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sync_state)")}
+            for column, kind in (('complete', 'INTEGER'), ('complete_at', 'REAL')):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE sync_state ADD COLUMN {column} {kind}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def upsert(self, resource, rows):
+        indexed = INDEXED_FIELDS[resource]
+        placeholders = ', '.join('?' * (len(indexed) + 4))
+        columns = ', '.join(('id', 'created_day', 'modified') + indexed + ('data',))
+        values = [
+            (row['id'], _day(row.get('created')), row.get('modified'))
+            + tuple(row.get(field) for field in indexed)
+            + (json.dumps(row),)
+            for row in rows if isinstance(row, dict) and row.get('id')
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(f"INSERT OR REPLACE INTO {resource} ({columns}) VALUES ({placeholders})", values)
+        return len(values)
+
+    def watermark(self, resource):
+        """Returns the 'modified' timestamp the last complete sync reached, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT watermark FROM sync_state WHERE resource = ?", (resource,)).fetchone()
+        return row[0] if row else None
+
+    def mark_synced(self, resource, synced_at, rows_synced, advance=True, complete=True):
+        """
+        Records a sync. The watermark only moves to the newest stored 'modified' value
+        when advance is set, so a sync with failed pages is retried from the old one.
+        Staleness is measured from the last complete sync: one that had neither failed
+        pages nor stopped at the record cap.
+        """
+        complete = complete and advance
+        with self._lock, self._conn:
+            previous = self._conn.execute(
+                "SELECT watermark, complete_at FROM sync_state WHERE resource = ?", (resource,)
+            ).fetchone()
+            watermark, complete_at = previous if previous else (None, None)
+            if advance:
+                watermark = self._conn.execute(f"SELECT max(modified) FROM {resource}").fetchone()[0]
+            if complete:
+                complete_at = synced_at
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state (resource, synced_at, rows_synced, watermark, complete, complete_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (resource, synced_at, rows_synced, watermark, int(complete), complete_at),
+            )
+
+    def state(self, resource):
+        with self._lock:
+            synced = self._conn.execute(
+                "SELECT synced_at, rows_synced, watermark, complete, complete_at FROM sync_state WHERE resource = ?",
+                (resource,),
+            ).fetchone()
+            count = self._conn.execute(f"SELECT count(*) FROM {resource}").fetchone()[0]
+        synced_at, rows_synced, watermark, complete, complete_at = synced or (None, 0, None, 0, None)
+        # age_seconds counts from the last complete sync, so a partial one leaves the mirror stale
+        return {
+            'resource': resource,
+            'rows': count,
+            'watermark': watermark,
+            'synced_at': synced_at,
+            'complete': bool(complete),
+            'complete_at': complete_at,
+            'age_seconds': round(time.time() - complete_at, 1) if complete_at else None,
+            'last_sync_rows': rows_synced,
+        }
+
+    def _field_sql(self, resource, field, spec):
+        if field == 'id':
+            return 'id'
+        if field == 'created':
+            return 'created_day'
+        if field in INDEXED_FIELDS[resource]:
+            return field
+        # Field names are \w+ (checked by the search parser), so they are safe to inline
+        expr = f"json_extract(data, '$.{field}')"
+        if (spec or {}).get('format') == 'date-time':
+            return f"replace(substr({expr}, 1, 10), '-', '')"
+        return expr
+
+    def _where(self, resource, conditions):
+        fields = SCHEMA_REGISTRY.get(resource) or {}
+        clauses, params, order = [], [], []
+        for field, operator, value in conditions:
+            spec = fields.get(field)
+            expr = self._field_sql(resource, field, spec)
+            if operator == SORT_OPERATOR:
+                order.append(f"{expr} {value.upper()}")
+            elif operator in LIST_OPERATORS:
+                items = [_param(item, spec) for item in value.split(',')]
+                marks = ', '.join('?' * len(items))
+                if operator == 'in':
+                    clauses.append(f"{expr} IN ({marks})")
+                else:
+                    clauses.append(f"({expr} IS NULL OR {expr} NOT IN ({marks}))")
+                params.extend(items)
+            elif operator in PATTERN_OPERATORS:
+                # %25 is the URL-encoded wildcard; a pattern without one matches anywhere in the value
+                pattern = value.replace('%25', '%')
+                if '%' not in pattern:
+                    pattern = f"%{pattern}%"
+                if operator == 'like':
+                    clauses.append(f"{expr} LIKE ?")
+                else:
+                    clauses.append(f"({expr} IS NULL OR {expr} NOT LIKE ?)")
+                params.append(pattern)
+            elif operator == 'equals' and value in ('', 'null'):
+                clauses.append(f"({expr} IS NULL OR {expr} = '')")
+            elif operator in ('equals', 'exact'):
+                clauses.append(f"{expr} = ?")
+                params.append(_param(value, spec))
+            elif operator == 'diff':
+                clauses.append(f"{expr} IS NOT ?")
+                params.append(_param(value, spec))
+            elif operator == 'greater':
+                clauses.append(f"{expr} > ?")
+                params.append(_param(value, spec))
+            elif operator == 'less':
+                clauses.append(f"{expr} < ?")
+                params.append(_param(value, spec))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        order_by = f" ORDER BY {', '.join(order)}" if order else " ORDER BY created_day DESC, id"
+        return where, params, order_by
+
+    def query(self, resource, conditions, limit=100, offset=0):
+        """Returns (matching row count, rows) for parsed search conditions."""
+        where, params, order_by = self._where(resource, conditions)
+        with self._lock:
+            total = self._conn.execute(f"SELECT count(*) FROM {resource}{where}", params).fetchone()[0]
+            cursor = self._conn.execute(
+                f"SELECT data FROM {resource}{where}{order_by} LIMIT ? OFFSET ?", params + [limit, offset]
+            )
+            rows = [json.loads(data) for (data,) in cursor]
+        return total, rows
@@ -1,13 +1,20 @@
 from mcp_instance import mcp
+from mcp_cache import response_cache
+from mcp_scheduler import upstream_scheduler
+from mcp_metrics import metrics_snapshot
+from mcp_results import result_store, ResultNotFound
+from mcp_common import json_dumps
+from mcp_schemas import SCHEMAS
 
 # --- Utility function to extract fields and types from a resource schema ---
 import re
+import asyncio
 import yaml
 
 def get_resource_fields_and_types(resource_func):
     """
     Given a resource function (decorated with @mcp.resource),
-    returns a dict of field names to {type, description} from the schema.
+    returns a dict of field names to {type, format, description} from the schema.
     """
     schema_str = resource_func()
     # Replace escaped newlines with real newlines for YAML parsing
@@ -29,18 +36,74 @@ def get_resource_fields_and_types(resource_func):
         for field, meta in properties.items():
             result[field] = {
                 'type': meta.get('type', 'object'),
+                'format': meta.get('format', ''),
                 'description': meta.get('description', '')
             }
         return result
     except Exception as e:
         return {'error': str(e)}
 
+# Schemas are parsed once at startup into schema name -> {field: {type, format, description}}
+SCHEMA_REGISTRY = {
+    name: get_resource_fields_and_types(lambda schema=schema: schema)
+    for name, schema in SCHEMAS.items()
+}
+
+@mcp.resource("schema://merchants")
+def get_merchants_schema():
+    """
+    Returns the merchantsResponse schema.
+    """
+    return SCHEMAS["merchants"]
+
+@mcp.resource("schema://txns")
+def get_txns_schema():
+    """
+    Returns the txnsResponse schema.
+    """
+    return SCHEMAS["txns"]
+
 @mcp.resource("schema://{schemaName}/fields")
 def get_resource_fields_and_types_by_name(schemaName: str):
     """
     Returns the fields and types for a given schema resource by name.
     """
-    resource_func = mcp.resources.get(f"schema://{schemaName}")
-    if not resource_func:
+    fields = SCHEMA_REGISTRY.get(schemaName)
+    if fields is None:
         return {"error": f"Resource schema://{schemaName} not found"}
-    return get_resource_fields_and_types(resource_func)
+    return fields
+
+@mcp.resource("cache://stats")
+def get_cache_stats():
+    """
+    Returns hit/miss/eviction counters of the by-ID response cache.
+    """
+    return response_cache.stats()
+
+@mcp.resource("scheduler://stats")
+def get_scheduler_stats():
+    """
+    Returns rate limiter, retry, queueing and circuit breaker counters of the upstream scheduler.
+    """
+    return upstream_scheduler.stats()
+
+@mcp.resource("metrics://tools")
+def get_tool_metrics():
+    """
+    Returns per-tool call counts, error classes, response sizes and latency histograms
+    split into total, upstream, parse and serialize time.
+    """
+    return metrics_snapshot()
+
+@mcp.resource("results://{handle}/page/{n}")
+async def get_result_page(handle: str, n: int):
+    """
+    Returns page n (starting at 1) of a large tool result stored under handle,
+    with the URI of the next page.
+    """
+    try:
+        return json_dumps(await asyncio.to_thread(result_store.page, handle, int(n)))
+    except ResultNotFound:
+        return {"error": f"Result {handle} not found; it may have expired, re-run the tool to get a new handle"}
+    except ValueError as e:
+        return {"error": str(e)}
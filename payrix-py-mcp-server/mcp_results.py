@@ -0,0 +1,279 @@
+import os
+import json
+import time
+import secrets
+import tempfile
+import threading
+from mcp_common import json_loads, json_dumps
+
+# Result store configuration: large list results are written here and read back page by page
+RESULTS_DIR = os.environ.get("RESULTS_DIR", os.path.join(tempfile.gettempdir(), "payrix_results"))
+RESULTS_TTL = float(os.environ.get("RESULTS_TTL", "900"))
+# Upper bound on the bytes of all stored results; the oldest handles are evicted first
+RESULTS_MAX_BYTES = int(os.environ.get("RESULTS_MAX_BYTES", str(256 * 1024 * 1024)))
+# Results larger than this are stored instead of returned inline, 0 disables spilling
+RESULTS_SPILL_BYTES = int(os.environ.get("RESULTS_SPILL_BYTES", str(256 * 1024)))
+RESULTS_PAGE_SIZE = int(os.environ.get("RESULTS_PAGE_SIZE", "100"))
+RESULTS_PREVIEW_ROWS = int(os.environ.get("RESULTS_PREVIEW_ROWS", "5"))
+# Seconds between rescans of the directory for results written by other worker processes
+RESULTS_SCAN_INTERVAL = float(os.environ.get("RESULTS_SCAN_INTERVAL", "60"))
+
+
+class ResultNotFound(KeyError):
+    """Raised for unknown, expired or evicted result handles."""
+
+
+def page_uri(handle, number):
+    return f"results://{handle}/page/{number}"
+
+
+def _open_private(path, mode):
+    # Results hold customer data, so only the server's own user may read them
+    return os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), mode)
+
+
+class ResultWriter:
+    """
+    Appends rows of one result as JSON lines, remembering the byte offset every
+    page starts at. The result only becomes readable once close() writes its metadata.
+    """
+
+    def __init__(self, store, handle, resource, page_size, max_bytes):
+        self.store = store
+        self.handle = handle
+        self.resource = resource
+        self.page_size = page_size
+        self.max_bytes = max_bytes
+        self.rows = 0
+        self.bytes = 0
+        self.truncated = False
+        self.offsets = []
+        self.fields = {}
+        self.preview = []
+        self._file = _open_private(store.rows_path(handle), 'wb')
+
+    def write(self, rows):
+        """Appends rows; returns False once the store's size bound is reached."""
+        for row in rows:
+            line = json_dumps(row).encode() + b'\n'
+            if self.bytes + len(line) > self.max_bytes:
+                self.truncated = True
+                return False
+            if self.rows % self.page_size == 0:
+                self.offsets.append(self.bytes)
+            self._file.write(line)
+            self.bytes += len(line)
+            self.rows += 1
+            if isinstance(row, dict):
+                self.fields.update(dict.fromkeys(row))
+            if len(self.preview) < RESULTS_PREVIEW_ROWS:
+                self.preview.append(row)
+        return True
+
+    def close(self, compact=False, details=None):
+        """Finishes the result and returns its metadata."""
+        self._file.close()
+        meta = {
+            'handle': self.handle,
+            'resource': self.resource,
+            'rows': self.rows,
+            'pages': len(self.offsets),
+            'page_size': self.page_size,
+            'fields': list(self.fields),
+            'compact': compact,
+            'bytes': self.bytes,
+            'truncated': self.truncated,
+            'offsets': self.offsets,
+            'details': details,
+            'created_at': time.time(),
+            'expires_at': time.time() + self.store.ttl,
+        }
+        # Metadata is written last and atomically, so readers never see a half-written result
+        path = self.store.meta_path(self.handle)
+        with _open_private(path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(path + '.tmp', path)
+        self.store._index[self.handle] = (meta['expires_at'], meta['created_at'], meta['bytes'])
+        self.store._start_sweeper()
+        return meta
+
+    def discard(self):
+        self._file.close()
+        self.store.remove(self.handle)
+
+
+class ResultStore:
+    """
+    Disk-backed store of large tool results, read back through results://{handle}/page/{n}.
+    Rows and metadata live in files, so every worker process sharing the directory can
+    serve any handle. Handles expire after ttl seconds and the oldest ones are evicted
+    when the directory grows past max_bytes. Eviction works from an in-memory index of
+    handle sizes and expiries, refreshed from the directory every scan_interval seconds.
+    While results exist a background thread sweeps expired ones, so they do not outlive
+    their ttl when no new result is created. The methods do blocking file IO; async
+    callers run them with asyncio.to_thread.
+    """
+
+    def __init__(self, directory=RESULTS_DIR, ttl=RESULTS_TTL, max_bytes=RESULTS_MAX_BYTES, page_size=RESULTS_PAGE_SIZE, scan_interval=RESULTS_SCAN_INTERVAL):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.page_size = max(1, page_size)
+        self.scan_interval = scan_interval
+        self._index = {}  # handle -> (expires_at, created_at, bytes) of finished results
+        self._scanned_at = None
+        self._sweeper = None
+        self._sweeper_lock = threading.Lock()
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+        self.pages_served = 0
+
+    def rows_path(self, handle):
+        return os.path.join(self.directory, f"{handle}.jsonl")
+
+    def meta_path(self, handle):
+        return os.path.join(self.directory, f"{handle}.json")
+
+    def remove(self, handle):
+        self._index.pop(handle, None)
+        for path in (self.rows_path(handle), self.meta_path(handle)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _scan(self):
+        # handle -> (expires_at, created_at, bytes) of every finished result in the directory
+        results = {}
+        names = set(os.listdir(self.directory))
+        for name in names:
+            if name.endswith('.jsonl') and name[:-1] not in names:
+                # Rows without metadata belong to a writer that is still running or died;
+                # only the latter are old enough to have expired
+                path = os.path.join(self.directory, name)
+                try:
+                    if os.path.getmtime(path) + self.ttl <= time.time():
+                        os.remove(path)
+                except OSError:
+                    pass
+                continue
+            if not name.endswith('.json'):
+                continue
+            handle = name[:-5]
+            try:
+                with open(self.meta_path(handle)) as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            results[handle] = (meta['expires_at'], meta['created_at'], meta['bytes'])
+        return results
+
+    def evict(self, reserve=0):
+        """Removes expired results, then the oldest ones until reserve more bytes fit."""
+        now = time.time()
+        if self._scanned_at is None or now - self._scanned_at >= self.scan_interval:
+            self._index = self._scan()
+            self._scanned_at = now
+        live = []
+        for handle, (expires_at, created_at, size) in list(self._index.items()):
+            if expires_at <= now:
+                self.remove(handle)
+                self.expired += 1
+            else:
+                live.append((created_at, handle, size))
+        used = sum(size for _, _, size in live)
+        for created_at, handle, size in sorted(live):
+            if used + reserve <= self.max_bytes:
+                break
+            self.remove(handle)
+            used -= size
+            self.evicted += 1
+
+    def _start_sweeper(self):
+        with self._sweeper_lock:
+            if self._sweeper is None:
+                self._sweeper = threading.Thread(target=self._sweep, name="result-sweeper", daemon=True)
+                self._sweeper.start()
+
+    def _sweep(self):
+        # Runs until no result is left; the next finished result starts it again
+        while True:
+            time.sleep(max(1.0, min(self.ttl, self.scan_interval)))
+            try:
+                self.evict()
+            except OSError:
+                pass
+            with self._sweeper_lock:
+                if not self._index:
+                    self._sweeper = None
+                    return
+
+    def create(self, resource, reserve=0):
+        """Starts a new result; reserve is the expected size to make room for."""
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        # makedirs leaves an existing directory alone, e.g. one created under a looser umask
+        os.chmod(self.directory, 0o700)
+        self.evict(min(reserve, self.max_bytes))
+        self.created += 1
+        return ResultWriter(self, secrets.token_hex(8), resource, self.page_size, self.max_bytes)
+
+    def meta(self, handle):
+        if not handle.isalnum():
+            raise ResultNotFound(handle)
+        try:
+            with open(self.meta_path(handle)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            raise ResultNotFound(handle)
+        if meta['expires_at'] <= time.time():
+            self.remove(handle)
+            self.expired += 1
+            raise ResultNotFound(handle)
+        return meta
+
+    def page(self, handle, number):
+        """Returns page number (1-based) of a result with a link to the next page."""
+        meta = self.meta(handle)
+        if not 1 <= number <= max(1, meta['pages']):
+            raise ValueError(f"Page {number} is out of range, result {handle} has {meta['pages']} pages")
+        rows = []
+        if meta['pages']:
+            offsets = meta['offsets']
+            start = offsets[number - 1]
+            end = offsets[number] if number < len(offsets) else meta['bytes']
+            with open(self.rows_path(handle), 'rb') as f:
+                f.seek(start)
+                chunk = f.read(end - start)
+            rows = [json_loads(line) for line in chunk.splitlines()]
+        if meta['compact']:
+            columns = meta['fields']
+            data = {'columns': columns, 'rows': [[row.get(c) for c in columns] for row in rows]}
+        else:
+            data = rows
+        self.pages_served += 1
+        return {
+            'handle': handle,
+            'page': number,
+            'pages': meta['pages'],
+            'rows': meta['rows'],
+            'data': data,
+            'next': page_uri(handle, number + 1) if number < meta['pages'] else None,
+            'expires_in': round(meta['expires_at'] - time.time()),
+        }
+
+    def stats(self):
+        return {
+            'directory': self.directory,
+            'created': self.created,
+            'expired': self.expired,
+            'evicted': self.evicted,
+            'pages_served': self.pages_served,
+            'indexed': len(self._index),
+            'indexed_bytes': sum(size for _, _, size in self._index.values()),
+            'ttl': self.ttl,
+            'max_bytes': self.max_bytes,
+        }
+
+
+result_store = ResultStore()
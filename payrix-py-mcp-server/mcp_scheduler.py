@@ -0,0 +1,312 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import functools
+import contextvars
+from email.utils import parsedate_to_datetime
+import httpx
+import mcp.types as types
+
+# Upstream scheduling configuration. Payrix allows 1,000 requests per 10 seconds
+# and blocks the key for 10 seconds when that is exceeded.
+UPSTREAM_RATE_LIMIT = float(os.environ.get("UPSTREAM_RATE_LIMIT", "90"))
+UPSTREAM_BURST = int(os.environ.get("UPSTREAM_BURST", "50"))
+UPSTREAM_MAX_CONCURRENCY = int(os.environ.get("UPSTREAM_MAX_CONCURRENCY", "32"))
+UPSTREAM_ENDPOINT_CONCURRENCY = int(os.environ.get("UPSTREAM_ENDPOINT_CONCURRENCY", "16"))
+UPSTREAM_MAX_RETRIES = int(os.environ.get("UPSTREAM_MAX_RETRIES", "3"))
+UPSTREAM_BACKOFF_BASE = float(os.environ.get("UPSTREAM_BACKOFF_BASE", "0.25"))
+UPSTREAM_BACKOFF_MAX = float(os.environ.get("UPSTREAM_BACKOFF_MAX", "10"))
+# Longest Retry-After a 429 is waited out for; a longer one returns the 429 instead of retrying early
+UPSTREAM_RETRY_AFTER_MAX = float(os.environ.get("UPSTREAM_RETRY_AFTER_MAX", "60"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.environ.get("CIRCUIT_RESET_TIMEOUT", "30"))
+
+# Statuses worth retrying; 429 additionally pauses every request until Retry-After
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+logger = logging.getLogger(__name__)
+
+# Per tool call upstream counters, shared with the tasks the call spawns
+_call_stats = contextvars.ContextVar("upstream_call_stats", default=None)
+
+
+def track_upstream():
+    """
+    Starts collecting upstream counters for the current tool call and returns the
+    dict they are written to (requests, attempts, retries, queued_ms, backoff_ms).
+    """
+    stats = {'requests': 0, 'attempts': 0, 'retries': 0, 'queued_ms': 0.0, 'backoff_ms': 0.0}
+    _call_stats.set(stats)
+    return stats
+
+
+def current_upstream_stats():
+    """Returns the counters of the current tool call, or None when it is not tracked."""
+    return _call_stats.get()
+
+
+def upstream_meta(func):
+    """
+    Attaches the upstream counters of a tool call to its result as _meta, leaving the
+    text content unchanged. Apply between @mcp.tool and @instrumented.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = _call_stats.set(None)
+        try:
+            result = await func(*args, **kwargs)
+            stats = _call_stats.get()
+        finally:
+            _call_stats.reset(token)
+        if stats is None or not isinstance(result, str):
+            return result
+        # structuredContent repeats the text as FastMCP shapes a str return value
+        return types.CallToolResult(
+            content=[types.TextContent(type="text", text=result)],
+            structuredContent={"result": result},
+            _meta={"upstream": dict(stats)},
+        )
+
+    return wrapper
+
+
+class CircuitOpenError(Exception):
+    """Raised without contacting Payrix while the circuit breaker is open."""
+
+
+class TokenBucket:
+    """Token bucket refilled at rate tokens per second, holding at most burst tokens."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        # The lock keeps waiters in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive upstream failures, then lets a single
+    trial request through once reset_timeout has passed. A trial that ends without
+    a verdict (429, cancellation, unexpected error) is released so another can run,
+    and one that never reports back is replaced after reset_timeout.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.trial_started = None  # monotonic start of the half-open trial in flight
+
+    def allow(self):
+        """Returns whether a request may go out, and whether it is the half-open trial."""
+        if self.failure_threshold <= 0 or self.state == "closed":
+            return True, False
+        now = time.monotonic()
+        if self.state == "open" and now - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+        if self.state == "half_open" and (self.trial_started is None or now - self.trial_started >= self.reset_timeout):
+            self.trial_started = now
+            return True, True
+        return False, False
+
+    def release_trial(self):
+        self.trial_started = None
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self.trial_started = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+            if self.state != "open":
+                self.times_opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self.trial_started = None
+
+
+def _retry_after(response):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _endpoint(url):
+    # '/txns/t1_txn_123' and '/txns' share the 'txns' concurrency cap
+    return str(url).strip('/').split('/')[0].split('?')[0]
+
+
+class RequestScheduler:
+    """
+    Single gate for Payrix requests: token-bucket rate limiting, global and
+    per-endpoint concurrency caps, jittered exponential backoff that honours
+    Retry-After, and a circuit breaker.
+    """
+
+    def __init__(self, rate=UPSTREAM_RATE_LIMIT, burst=UPSTREAM_BURST, max_concurrency=UPSTREAM_MAX_CONCURRENCY,
+                 endpoint_concurrency=UPSTREAM_ENDPOINT_CONCURRENCY, max_retries=UPSTREAM_MAX_RETRIES,
+                 backoff_base=UPSTREAM_BACKOFF_BASE, backoff_max=UPSTREAM_BACKOFF_MAX,
+                 retry_after_max=UPSTREAM_RETRY_AFTER_MAX, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_timeout=CIRCUIT_RESET_TIMEOUT):
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_concurrency = max(1, max_concurrency)
+        self.endpoint_concurrency = max(1, endpoint_concurrency)
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_after_max = retry_after_max
+        self._global = asyncio.Semaphore(self.max_concurrency)
+        self._endpoints = {}
+        self._blocked_until = 0.0
+        self.counters = {
+            'requests': 0, 'attempts': 0, 'retries': 0, 'rate_limited': 0,
+            'failures': 0, 'rejected_open_circuit': 0, 'queued_ms_total': 0.0, 'in_flight': 0,
+        }
+
+    def _endpoint_semaphore(self, url):
+        key = _endpoint(url)
+        semaphore = self._endpoints.get(key)
+        if semaphore is None:
+            semaphore = self._endpoints[key] = asyncio.Semaphore(self.endpoint_concurrency)
+        return semaphore
+
+    def _backoff(self, attempt):
+        # Full jitter: uniform between 0 and the capped exponential delay
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _wait_for_unblock(self):
+        delay = self._blocked_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def get(self, client, url, params=None, headers=None):
+        """
+        Sends a GET through the scheduler and returns the final httpx.Response.
+        Transport errors are re-raised once retries are exhausted.
+        """
+        stats = _call_stats.get()
+        self.counters['requests'] += 1
+        if stats is not None:
+            stats['requests'] += 1
+        attempt = 0
+        while True:
+            allowed, is_trial = self.breaker.allow()
+            if not allowed:
+                self.counters['rejected_open_circuit'] += 1
+                raise CircuitOpenError(
+                    f"Payrix circuit breaker is open after {self.breaker.failures} consecutive failures; "
+                    f"requests resume within {self.breaker.reset_timeout:.0f}s"
+                )
+            queued_at = time.monotonic()
+            settled = False
+            try:
+                async with self._global, self._endpoint_semaphore(url):
+                    await self._wait_for_unblock()
+                    await self.bucket.acquire()
+                    queued_ms = (time.monotonic() - queued_at) * 1000
+                    self.counters['queued_ms_total'] += queued_ms
+                    self.counters['attempts'] += 1
+                    self.counters['in_flight'] += 1
+                    if stats is not None:
+                        stats['attempts'] += 1
+                        stats['queued_ms'] = round(stats['queued_ms'] + queued_ms, 1)
+                    try:
+                        response = await client.get(url, params=params, headers=headers)
+                        error = None
+                    except httpx.TransportError as e:
+                        response, error = None, e
+                    finally:
+                        self.counters['in_flight'] -= 1
+
+                if error is None and response.status_code not in RETRY_STATUSES:
+                    self.breaker.record_success()
+                    settled = True
+                    return response
+                if error is not None or response.status_code != 429:
+                    # Rate limiting says nothing about upstream health, everything else does
+                    self.counters['failures'] += 1
+                    self.breaker.record_failure()
+                    settled = True
+                else:
+                    self.counters['rate_limited'] += 1
+            finally:
+                # A trial without a verdict (429, cancelled, unexpected error) must not
+                # leave the breaker half open with nobody allowed to try again
+                if is_trial and not settled:
+                    self.breaker.release_trial()
+            delay = self._backoff(attempt)
+            if response is not None and response.status_code == 429:
+                retry_after = _retry_after(response)
+                if retry_after is not None:
+                    # Retry-After is honoured as sent, retrying earlier only extends the block
+                    delay = max(delay, retry_after)
+                # Hold back every request, not only this one, until the limit resets; a block
+                # longer than retry_after_max is handed back as the 429 instead of waited out
+                self._blocked_until = max(self._blocked_until, time.monotonic() + min(delay, self.retry_after_max))
+                if delay > self.retry_after_max:
+                    return response
+            if attempt >= self.max_retries:
+                if error is not None:
+                    raise error
+                return response
+
+            attempt += 1
+            self.counters['retries'] += 1
+            if stats is not None:
+                stats['retries'] += 1
+                stats['backoff_ms'] = round(stats['backoff_ms'] + delay * 1000, 1)
+            logger.info(f"Retrying GET {url} in {delay:.2f}s (attempt {attempt + 1}): "
+                        f"{error if error is not None else response.status_code}")
+            await asyncio.sleep(delay)
+
+    def stats(self):
+        attempts = self.counters['attempts']
+        return dict(
+            self.counters,
+            queued_ms_total=round(self.counters['queued_ms_total'], 1),
+            queued_ms_avg=round(self.counters['queued_ms_total'] / attempts, 2) if attempts else 0.0,
+            circuit_state=self.breaker.state,
+            circuit_failures=self.breaker.failures,
+            circuit_times_opened=self.breaker.times_opened,
+            blocked_for_s=round(max(0.0, self._blocked_until - time.monotonic()), 2),
+            rate_limit=self.bucket.rate,
+            burst=self.bucket.burst,
+            retry_after_max=self.retry_after_max,
+            max_concurrency=self.max_concurrency,
+            endpoint_concurrency=self.endpoint_concurrency,
+        )
+
+
+upstream_scheduler = RequestScheduler()
@@ -0,0 +1,183 @@
+# Response schemas of the Payrix resources, in the YAML 'properties:' layout read by
+# mcp_resources.get_resource_fields_and_types. Date-time fields are searched with
+# YYYYMMDD values, yyyymmdd fields are integers holding a date.
+
+MERCHANTS_SCHEMA = """\
+properties:
+  id: {type: string}
+  created: {type: string, format: date-time}
+  modified: {type: string, format: date-time}
+  creator: {type: string}
+  modifier: {type: string}
+  lastActivity: {type: string, format: date-time}
+  totalApprovedSales: {type: integer, format: int64}
+  entity: {type: string}
+  dba: {type: string, description: '0-50 chars'}
+  new: {type: integer, description: '0 or 1'}
+  incrementalAuthSupported: {type: integer, description: '0 or 1'}
+  seasonal: {type: integer, description: '0 or 1'}
+  advancedBilling: {type: integer, description: '0 or 1'}
+  established: {type: integer, format: yyyymmdd}
+  annualCCSales: {type: integer, format: int64}
+  annualCCSaleVolume: {type: integer, format: int64}
+  annualACHSaleVolume: {type: integer, format: int64}
+  amexVolume: {type: integer, format: int64}
+  avgTicket: {type: integer, format: int64}
+  amex: {type: string, description: '1-15 chars'}
+  discover: {type: string, description: '1-15 chars'}
+  mcc: {type: string}
+  visaMvv: {type: string}
+  visaDisclosure: {type: integer, description: '0 or 1'}
+  disclosureIP: {type: string}
+  disclosureDate: {type: integer, format: yyyymmdd}
+  environment: {type: string, description: 'e.g., supermarket, moto, cardPresent, etc.'}
+  status: {type: integer, description: '0-6'}
+  autoBoarded: {type: integer, description: '0 or 1'}
+  statusReason: {type: string}
+  accountClosureReasonCode: {type: string}
+  accountClosureReasonDate: {type: integer, format: yyyymmdd}
+  riskLevel: {type: string, description: 'restricted, prohibited, high, medium, low'}
+  creditRatio: {type: integer, format: int32}
+  creditTimeliness: {type: integer, format: int32}
+  chargebackRatio: {type: integer, format: int32}
+  ndxDays: {type: integer, format: int32}
+  ndxPercentage: {type: integer, format: int32}
+  boarded: {type: integer, format: int32}
+  saqType: {type: string, description: 'SAQ-A, SAQ-A-EP, SAQ-B, SAQ-B-IP, SAQ-C-VT, SAQ-C, SAQ-P2PE-HW, SAQ-D'}
+  saqDate: {type: integer, format: yyyymmdd}
+  qsa: {type: string}
+  letterStatus: {type: integer, description: '0 or 1'}
+  letterDate: {type: integer, format: yyyymmdd}
+  tcAttestation: {type: integer, description: '0 or 1'}
+  tmxSessionId: {type: string}
+  chargebackNotificationEmail: {type: string}
+  locationType: {type: string, description: '77, 78, 79, 80, 81'}
+  percentKeyed: {type: integer, format: int32}
+  totalVolume: {type: integer, format: int64}
+  percentEcomm: {type: integer, format: int32}
+  percentBusiness: {type: integer, format: int32}
+  applePayActive: {type: integer, description: '0 or 1'}
+  applePayStatus: {type: string}
+  googlePayActive: {type: integer, description: '0 or 1'}
+  naics: {type: string, description: 'see NAICS codes'}
+  naicsDescription: {type: string}
+  expressBatchCloseMethod: {type: string, description: 'TimeInitiated, MerchantInitiated'}
+  expressBatchCloseTime: {type: string}
+  passTokenEnabled: {type: integer, description: '0 or 1'}
+  inactive: {type: integer, description: '0 or 1'}
+  frozen: {type: integer, description: '0 or 1'}
+title: merchantsResponse
+type: object
+"""
+
+TXNS_SCHEMA = """\
+properties:
+  id: {type: string}
+  created: {type: string, format: date-time}
+  modified: {type: string, format: date-time}
+  creator: {type: string}
+  modifier: {type: string}
+  ipCreated: {type: string}
+  ipModified: {type: string}
+  merchant: {type: string}
+  token: {type: string}
+  payment: {type: string}
+  fortxn: {type: string}
+  fromtxn: {type: string}
+  batch: {type: string}
+  subscription: {type: string}
+  statement: {type: string}
+  type: {type: object}
+  expiration: {type: string}
+  serviceCode: {type: string}
+  funded: {type: integer}
+  returned: {type: string}
+  currency: {type: object}
+  fundingCurrency: {type: object}
+  currencyConversion: {type: object}
+  convenienceFee: {type: integer}
+  fee: {type: number}
+  platform: {type: object}
+  authDate: {type: integer}
+  authCode: {type: string}
+  captured: {type: string}
+  settled: {type: string}
+  settledCurrency: {type: object}
+  settledTotal: {type: integer}
+  allowPartial: {type: object}
+  order: {type: string}
+  description: {type: string}
+  descriptor: {type: string}
+  traceNumber: {type: integer}
+  discount: {type: integer}
+  shipping: {type: integer}
+  duty: {type: integer}
+  terminal: {type: string}
+  terminalCapability: {type: object}
+  entryMode: {type: object}
+  origin: {type: object}
+  mobile: {type: object}
+  tax: {type: integer}
+  surcharge: {type: integer}
+  total: {type: integer}
+  cashback: {type: integer}
+  authorization: {type: string}
+  originalApproved: {type: integer}
+  approved: {type: integer}
+  authentication: {type: string}
+  authenticationId: {type: string}
+  cvv: {type: integer}
+  cvvStatus: {type: object}
+  swiped: {type: object}
+  emv: {type: object}
+  signature: {type: object}
+  pin: {type: object}
+  pinEntryCapability: {type: object}
+  unattended: {type: object}
+  cofType: {type: object}
+  copyReason: {type: object}
+  clientIp: {type: string}
+  first: {type: string}
+  middle: {type: string}
+  last: {type: string}
+  company: {type: string}
+  email: {type: string}
+  address1: {type: string}
+  address2: {type: string}
+  city: {type: string}
+  state: {type: string}
+  zip: {type: string}
+  country: {type: object}
+  phone: {type: string}
+  mid: {type: string}
+  status: {type: object}
+  refunded: {type: integer}
+  reserved: {type: object}
+  misused: {type: object}
+  checkStage: {type: object}
+  unauthReason: {type: object}
+  authTokenCustomer: {type: string}
+  channel: {type: string}
+  imported: {type: object}
+  requestSequence: {type: integer}
+  processedSequence: {type: integer}
+  debtRepayment: {type: object}
+  fundingEnabled: {type: object}
+  fbo: {type: string}
+  txnsession: {type: string}
+  inactive: {type: object}
+  frozen: {type: object}
+  tip: {type: integer}
+  softPosId: {type: string}
+  softPosDeviceTypeIndicator: {type: string}
+  networkTokenIndicator: {type: object}
+  txnRefs: {type: array}
+  pinlessDebitConversion: {type: object}
+title: txnsResponse
+type: object
+"""
+
+SCHEMAS = {
+    "merchants": MERCHANTS_SCHEMA,
+    "txns": TXNS_SCHEMA,
+}
@@ -0,0 +1,163 @@
+import re
+import difflib
+import datetime
+from mcp_resources import SCHEMA_REGISTRY
+
+# Common supported search operators for all tools
+SUPPORTED_SEARCH_OPERATORS = (
+    "| Operator   | Usage Example                | Description                  |\n"
+    "|-----------|------------------------------|------------------------------|\n"
+    "| equals    | status[equals]=2             | Equality (null/0/empty OK)   |\n"
+    "| exact     | dba[exact]=Acme Inc          | Exact match                  |\n"
+    "| greater   | created[greater]=20240601    | Greater than (date/number)   |\n"
+    "| less      | created[less]=20250801       | Less than (date/number)      |\n"
+    "| in        | status[in]=1,2,3             | In list (comma, no spaces)   |\n"
+    "| like      | dba[like]=Test%25            | Partial string (wildcard %25)|\n"
+    "| notlike   | dba[notlike]=%25Test%25      | Not like (wildcard %25)      |\n"
+    "| diff      | status[diff]=0               | Not equal                    |\n"
+    "| notin     | status[notin]=1,2            | Not in list                  |"
+)
+
+# Operator names, read from the first column of the table above
+SEARCH_OPERATORS = tuple(
+    line.split('|')[1].strip() for line in SUPPORTED_SEARCH_OPERATORS.split('\n')[2:]
+)
+LIST_OPERATORS = ("in", "notin")
+PATTERN_OPERATORS = ("like", "notlike")
+# 'sort' shares the key[operator]=value syntax but only takes asc/desc
+SORT_OPERATOR = "sort"
+SORT_VALUES = ("asc", "desc")
+
+_CONDITION = re.compile(r'^(\w+)\[(\w+)\]=(.*)$', re.DOTALL)
+_INTEGER = re.compile(r'^-?\d+$')
+_DATE = re.compile(r'^(\d{4})-?(\d{2})-?(\d{2})$')
+
+
+class SearchError(ValueError):
+    """Raised when a search expression is rejected before it is sent upstream."""
+
+
+def _suggest(word, candidates):
+    lowered = {c.lower(): c for c in candidates}
+    matches = difflib.get_close_matches(word.lower(), list(lowered), n=1, cutoff=0.6)
+    return f" (did you mean '{lowered[matches[0]]}'?)" if matches else ""
+
+
+def _normalize_date(value):
+    # Dates are sent as YYYYMMDD; YYYY-MM-DD is accepted and rewritten
+    match = _DATE.match(value)
+    if not match:
+        raise ValueError(f"'{value}' is not a date, use YYYYMMDD")
+    year, month, day = (int(part) for part in match.groups())
+    try:
+        datetime.date(year, month, day)
+    except ValueError:
+        raise ValueError(f"'{value}' is not a valid calendar date")
+    return f"{year:04d}{month:02d}{day:02d}"
+
+
+def _normalize_scalar(value, spec):
+    kind = spec.get('type')
+    fmt = spec.get('format')
+    if fmt in ('date-time', 'yyyymmdd'):
+        return _normalize_date(value)
+    if kind == 'integer':
+        if not _INTEGER.match(value):
+            raise ValueError(f"'{value}' is not an integer")
+        return str(int(value))
+    if kind == 'number':
+        try:
+            float(value)
+        except ValueError:
+            raise ValueError(f"'{value}' is not a number")
+        return value
+    return value
+
+
+def _normalize_value(field, operator, value, spec):
+    if operator == SORT_OPERATOR:
+        if value.lower() not in SORT_VALUES:
+            raise ValueError(f"sort takes 'asc' or 'desc', got '{value}'")
+        return value.lower()
+    if operator in PATTERN_OPERATORS:
+        if not value:
+            raise ValueError("a pattern is required")
+        return value
+    if operator in LIST_OPERATORS:
+        items = [item.strip() for item in value.split(',') if item.strip()]
+        if not items:
+            raise ValueError("at least one value is required")
+        if spec is not None:
+            items = [_normalize_scalar(item, spec) for item in items]
+        # List operators have set semantics, so a sorted unique list is the canonical form
+        items = sorted(set(items), key=lambda item: (len(item), item) if _INTEGER.match(item) else (0, item))
+        return ','.join(items)
+    if spec is None:
+        return value
+    if operator == 'equals' and value in ('', 'null', '0'):
+        return value
+    return _normalize_scalar(value, spec)
+
+
+def parse_search(resource, search):
+    """
+    Validates a 'key[operator]=value&...' search expression against the schema of
+    the given resource. Returns the sorted, de-duplicated (field, operator, value)
+    filter conditions with normalized values followed by the sort terms in the order
+    given, plus the advanced and/or parts that are passed through unchecked. Raises
+    SearchError listing every problem.
+    """
+    if not search or not search.strip():
+        return [], []
+    fields = SCHEMA_REGISTRY.get(resource) or {}
+    conditions = []
+    sorts = []
+    passthrough = []
+    problems = []
+    for part in search.split('&'):
+        part = part.strip()
+        if not part:
+            continue
+        match = _CONDITION.match(part)
+        if not match:
+            if part.startswith(('and[', 'or[')):
+                passthrough.append(part)
+            else:
+                problems.append(f"'{part}' is not in key[operator]=value format")
+            continue
+        field, operator, value = match.groups()
+        value = value.strip()
+        if operator not in SEARCH_OPERATORS and operator != SORT_OPERATOR:
+            problems.append(
+                f"unknown operator '{operator}' in '{part}'{_suggest(operator, SEARCH_OPERATORS + (SORT_OPERATOR,))}"
+            )
+            continue
+        spec = fields.get(field)
+        if fields and spec is None:
+            problems.append(f"unknown {resource} field '{field}'{_suggest(field, fields)}")
+            continue
+        try:
+            value = _normalize_value(field, operator, value, spec)
+        except ValueError as e:
+            problems.append(f"{field}[{operator}]: {e}")
+            continue
+        if operator == SORT_OPERATOR:
+            # Sort terms are ordered by priority; a repeated field keeps its first position
+            if all(sorted_field != field for sorted_field, _, _ in sorts):
+                sorts.append((field, operator, value))
+        else:
+            conditions.append((field, operator, value))
+    if problems:
+        raise SearchError(f"Invalid search for {resource}: " + "; ".join(problems))
+    return sorted(set(conditions)) + sorts, passthrough
+
+
+def compile_search(resource, search):
+    """
+    Returns the canonical form of a search expression: values normalized (dates
+    as YYYYMMDD, lists sorted), filter conditions in a stable order and sort terms
+    in the order given.
+    """
+    conditions, passthrough = parse_search(resource, search)
+    canonical = [f"{field}[{operator}]={value}" for field, operator, value in conditions]
+    return '&'.join(canonical + passthrough)
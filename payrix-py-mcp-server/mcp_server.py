@@ -16,6 +16,7 @@ from mcp_tools import *
 from mcp_resources import *
 from mcp_prompts import *
 from mcp_instance import mcp
+from mcp_http import MCP_HOST, MCP_PORT, MCP_WORKERS, configure_transport_security, run_http
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -26,9 +27,17 @@ def parse_args():
     parser = argparse.ArgumentParser(description="MCP Server for Payrix")
     parser.add_argument(
         "--transport", 
-        choices=["sse", "io"], 
+        choices=["sse", "io", "http"], 
         default="sse",
-        help="Transport type (sse or io)"
+        help="Transport type (sse, io or http for stateless streamable HTTP)"
+    )
+    parser.add_argument("--host", default=MCP_HOST, help="Bind address for sse and http")
+    parser.add_argument("--port", type=int, default=MCP_PORT, help="Port for sse and http")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=MCP_WORKERS,
+        help="Worker processes for the http transport"
     )
     return parser.parse_args()
 
@@ -36,8 +45,14 @@ if __name__ == "__main__":
     args = parse_args()
     logger.info(f"Starting MCP server with {args.transport} transport")
     
-    if args.transport == "sse":
-        # Run with SSE transport (default host and port)
+    if args.transport == "http":
+        # Stateless streamable HTTP, scaled across worker processes
+        run_http(host=args.host, port=args.port, workers=max(1, args.workers))
+    elif args.transport == "sse":
+        # Run with SSE transport
+        mcp.settings.host = args.host
+        mcp.settings.port = args.port
+        configure_transport_security(args.host)
         mcp.run(transport="sse")
     else:
         # Run with stdio transport
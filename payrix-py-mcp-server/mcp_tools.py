@@ -1,22 +1,36 @@
-# Common supported search operators for all tools
-SUPPORTED_SEARCH_OPERATORS = (
-    "| Operator   | Usage Example                | Description                  |\n"
-    "|-----------|------------------------------|------------------------------|\n"
-    "| equals    | status[equals]=2             | Equality (null/0/empty OK)   |\n"
-    "| exact     | dba[exact]=Acme Inc          | Exact match                  |\n"
-    "| greater   | created[greater]=20240601    | Greater than (date/number)   |\n"
-    "| less      | created[less]=20250801       | Less than (date/number)      |\n"
-    "| in        | status[in]=1,2,3             | In list (comma, no spaces)   |\n"
-    "| like      | dba[like]=Test%25            | Partial string (wildcard %25)|\n"
-    "| notlike   | dba[notlike]=%25Test%25      | Not like (wildcard %25)      |\n"
-    "| diff      | status[diff]=0               | Not equal                    |\n"
-    "| notin     | status[notin]=1,2            | Not in list                  |"
-)
 from mcp_instance import mcp
 from mcp.server.fastmcp import Context
-from mcp_common import get_http_client
+from mcp_common import (
+    get_http_client,
+    json_loads,
+    json_dumps,
+    SEARCH_VALIDATION,
+    PAGINATION_CONCURRENCY,
+    PAGINATION_PAGE_LIMIT,
+    PAGINATION_MAX_RECORDS,
+    AGGREGATE_MAX_RECORDS,
+    BULK_ID_CHUNK_SIZE,
+    BULK_ID_MAX_IDS,
+    BULK_ID_FALLBACK_CONCURRENCY,
+    MIRROR_ENABLED,
+    MIRROR_PATH,
+    MIRROR_MAX_STALENESS,
+    MIRROR_SYNC_MAX_RECORDS,
+)
+from mcp_cache import response_cache, cache_key
+from mcp_aggregate import TxnAggregator
+from mcp_search import SUPPORTED_SEARCH_OPERATORS, SearchError, compile_search, parse_search
+from mcp_mirror import LocalMirror, INDEXED_FIELDS
+from mcp_scheduler import upstream_scheduler, track_upstream, current_upstream_stats, upstream_meta
+from mcp_metrics import add_phase_time, instrumented
+from mcp_results import result_store, page_uri, RESULTS_SPILL_BYTES
 
+import asyncio
+import contextlib
+import datetime
 import logging
+import math
+import time
 
  # Helper for GET requests with error handling and custom headers
 async def _do_get(client, url, query_params=None, headers=None):
@@ -24,171 +38,748 @@ async def _do_get(client, url, query_params=None, headers=None):
         query_params = {}
     if headers is None:
         headers = {}
+    started = time.perf_counter()
     try:
-        response = await client.get(url, params=query_params, headers=headers)
+        response = await upstream_scheduler.get(client, url, params=query_params, headers=headers)
         response.raise_for_status()
         return str(response.text)
     except Exception as e:
         if hasattr(e, 'response') and hasattr(e.response, 'status_code'):
-            return f"API Error: {e.response.status_code} - {getattr(e.response, 'text', str(e))}"
-        return f"Error: {str(e)}"
+            return f"API Error: {e.response.status_code} - {getattr(e.response, 'text', str(e))}{_retry_note()}"
+        return f"Error: {str(e)}{_retry_note()}"
+    finally:
+        add_phase_time("upstream", time.perf_counter() - started)
+
+
+def _retry_note():
+    stats = current_upstream_stats()
+    if not stats or not stats['retries']:
+        return ''
+    return f" (after {stats['retries']} retries, {stats['queued_ms']:.0f} ms queued, {stats['backoff_ms']:.0f} ms backoff)"
+
+
+ # Returns the canonical search header, or an error message that saves the upstream round-trip
+def _compile_search(resource, search):
+    if not SEARCH_VALIDATION or not isinstance(search, str):
+        return search, None
+    try:
+        return compile_search(resource, search), None
+    except SearchError as e:
+        return None, f"Error: {e}"
+
+
+def _is_ok_response(raw):
+    return not raw.startswith(("API Error:", "Error:"))
+
+
+ # Helper for by-ID GET requests served through the response cache
+async def _cached_get(client, resource, url, headers, refresh=False):
+    return await response_cache.get_or_fetch(
+        cache_key(url, headers.get('search')),
+        resource,
+        lambda: _do_get(client, url, headers=headers),
+        refresh=refresh,
+        cacheable=_is_ok_response,
+    )
+
+
+def _response_body(resp):
+    # Payrix wraps list payloads in a top-level 'response' object
+    if isinstance(resp, dict) and isinstance(resp.get('response'), dict):
+        return resp['response']
+    return resp
+
+
+def _page_count(details, page_limit):
+    page = details.get('page') or {}
+    if page.get('last'):
+        return int(page['last'])
+    totals = details.get('totals') or {}
+    count = totals.get('count') if isinstance(totals, dict) else None
+    if count:
+        return math.ceil(int(count) / page_limit)
+    return 1
+
+
+ # Helper that fetches and parses a single page of a list endpoint
+async def _fetch_page(client, url, headers, number, page_limit):
+    raw = await _do_get(client, url, {'page[number]': number, 'page[limit]': page_limit}, headers)
+    if not _is_ok_response(raw):
+        return None, raw
+    try:
+        body = _response_body(json_loads(raw))
+    except ValueError:
+        return None, raw
+    if not isinstance(body, dict):
+        return None, raw
+    return body, None
+
+
+ # Fetches pages first..last concurrently and yields (number, rows, errors) as each one completes
+async def _iter_pages(ctx, client, url, headers, first, last, page_limit):
+    semaphore = asyncio.Semaphore(max(1, PAGINATION_CONCURRENCY))
+
+    async def fetch(number):
+        async with semaphore:
+            return number, await _fetch_page(client, url, headers, number, page_limit)
+
+    tasks = [asyncio.ensure_future(fetch(n)) for n in range(first, last + 1)]
+    done = first - 1
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            number, (body, error) = await next_done
+            done += 1
+            if ctx is not None:
+                await ctx.report_progress(done, last)
+            if body is None:
+                yield number, [], [f"page {number}: {error}"]
+            else:
+                yield number, list(body.get('data') or []), list(body.get('errors') or [])
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+ # Fetches the first page with totals and works out how many pages a capped scan needs
+async def _first_page(ctx, client, url, headers, page_limit, max_records):
+    body, error = await _fetch_page(client, url, headers, 1, page_limit)
+    if body is None:
+        return None, error, 0, 0
+    details = body.get('details') or {}
+    last_page = _page_count(details, page_limit)
+    pages_needed = min(last_page, math.ceil(max_records / page_limit))
+    if ctx is not None:
+        await ctx.report_progress(1, pages_needed)
+    return body, None, last_page, pages_needed
+
+
+ # Projects rows down to the requested fields and optionally packs them as columns + value arrays
+def _shape_rows(rows, fields=None, drop_nulls=False, compact=False):
+    if not fields:
+        fields = list(dict.fromkeys(key for row in rows if isinstance(row, dict) for key in row))
+    if compact:
+        values = [[row.get(field) for field in fields] for row in rows if isinstance(row, dict)]
+        if drop_nulls:
+            # A column can only be dropped when it is null in every row
+            keep = [i for i in range(len(fields)) if any(v[i] is not None for v in values)]
+            fields = [fields[i] for i in keep]
+            values = [[v[i] for i in keep] for v in values]
+        return {'columns': fields, 'rows': values}
+    shaped = []
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        projected = {field: row.get(field) for field in fields}
+        if drop_nulls:
+            projected = {k: v for k, v in projected.items() if v is not None}
+        shaped.append(projected)
+    return shaped
+
+
+ # Parses a list response once, handles the empty case and applies field projection.
+ # With spill_resource set, responses whose shaped rows exceed RESULTS_SPILL_BYTES go to the result store.
+async def _format_list_response(raw, empty_message, fields=None, drop_nulls=False, compact=False, spill_resource=None):
+    if not _is_ok_response(raw):
+        return raw
+    try:
+        resp = json_loads(raw)
+    except ValueError:
+        return raw
+    body = _response_body(resp)
+    if not isinstance(body, dict) or 'data' not in body:
+        return raw
+    if not body['data']:
+        return empty_message
+    reshape = (fields or drop_nulls or compact) and isinstance(body['data'], list)
+    shaped = _shape_rows(body['data'], fields, drop_nulls, compact) if reshape else None
+    # The upstream text bounds the projected size, so only oversized responses are measured again
+    if spill_resource and RESULTS_SPILL_BYTES and len(raw) > RESULTS_SPILL_BYTES and isinstance(body['data'], list):
+        size = len(json_dumps(shaped)) if reshape else len(raw)
+        if size > RESULTS_SPILL_BYTES:
+            # File IO runs in a thread so the event loop keeps serving other calls
+            writer = await asyncio.to_thread(result_store.create, spill_resource, size)
+            try:
+                await asyncio.to_thread(writer.write, _spill_rows(body['data'], fields, drop_nulls))
+            except BaseException:
+                writer.discard()
+                raise
+            return await _spilled_response(writer, compact, body.get('details'), body.get('errors') or [])
+    if not reshape:
+        # Nothing to reshape, hand back the upstream text untouched
+        return raw
+    body['data'] = shaped
+    return json_dumps(resp)
+
+
+ # Rows as the result store keeps them: projected, but never compacted, so pages can be cut anywhere
+def _spill_rows(rows, fields=None, drop_nulls=False):
+    return _shape_rows(rows, fields, drop_nulls) if (fields or drop_nulls) else rows
+
+
+ # Finishes a stored result and returns the handle, a summary and the first rows inline
+async def _spilled_response(writer, compact, details, errors):
+    meta = await asyncio.to_thread(writer.close, compact, details)
+    preview = writer.preview
+    if compact:
+        preview = _shape_rows(preview, meta['fields'], compact=True)
+    return json_dumps({
+        'result': {
+            'handle': meta['handle'],
+            'rows': meta['rows'],
+            'pages': meta['pages'],
+            'page_size': meta['page_size'],
+            'fields': meta['fields'],
+            'bytes': meta['bytes'],
+            'truncated': meta['truncated'],
+            'expires_in': round(result_store.ttl),
+            'first_page': page_uri(meta['handle'], 1) if meta['pages'] else None,
+        },
+        'preview': preview,
+        'details': details,
+        'errors': errors,
+    })
+
+
+ # fetch_all variant that streams pages into the result store in page order
+async def _spill_all_pages(ctx, client, url, headers, first, last_page, pages_needed, page_limit, max_records, fields, drop_nulls, compact, resource, reserve):
+    writer = await asyncio.to_thread(result_store.create, resource, reserve)
+    errors = list(first.get('errors') or [])
+    seen = 0
+
+    async def write(rows):
+        nonlocal seen
+        room = max_records - seen
+        seen += len(rows)
+        return room > 0 and await asyncio.to_thread(writer.write, _spill_rows(rows[:room], fields, drop_nulls))
+
+    try:
+        await write(list(first.get('data') or []))
+        # Pages that complete early wait here until every page before them is written
+        pending, next_page = {}, 2
+        pages = _iter_pages(ctx, client, url, headers, 2, pages_needed, page_limit)
+        async with contextlib.aclosing(pages):
+            async for number, page_rows, page_errors in pages:
+                pending[number] = page_rows
+                errors.extend(page_errors)
+                while next_page in pending:
+                    await write(pending.pop(next_page))
+                    next_page += 1
+                if writer.truncated:
+                    break
+    except BaseException:
+        writer.discard()
+        raise
+    return await _spilled_response(writer, compact, {
+        'page': {'fetched': pages_needed, 'last': last_page, 'limit': page_limit},
+        'totals': (first.get('details') or {}).get('totals'),
+        'truncated': seen > max_records or pages_needed < last_page or writer.truncated,
+        'upstream': current_upstream_stats(),
+    }, errors)
+
+
+ # Helper that fetches every page of a list endpoint and merges the rows in page order
+async def _get_all_pages(ctx, client, url, headers, page_limit, max_records, empty_message, fields=None, drop_nulls=False, compact=False, spill_resource=None):
+    page_limit = page_limit or PAGINATION_PAGE_LIMIT
+    max_records = max_records or PAGINATION_MAX_RECORDS
+    headers = dict(headers, totals='true')
+    first, error, last_page, pages_needed = await _first_page(ctx, client, url, headers, page_limit, max_records)
+    if first is None:
+        return error
+    rows = list(first.get('data') or [])
+    if not rows:
+        return empty_message
+    if spill_resource and RESULTS_SPILL_BYTES:
+        # Estimate the merged size from the first page before holding every page in memory
+        expected_rows = min(max_records, pages_needed * page_limit)
+        estimate = len(json_dumps(_spill_rows(rows, fields, drop_nulls))) / len(rows) * expected_rows
+        if estimate > RESULTS_SPILL_BYTES:
+            return await _spill_all_pages(ctx, client, url, headers, first, last_page, pages_needed, page_limit,
+                                          max_records, fields, drop_nulls, compact, spill_resource, int(estimate))
+    errors = list(first.get('errors') or [])
+    pages = {}
+    async for number, page_rows, page_errors in _iter_pages(ctx, client, url, headers, 2, pages_needed, page_limit):
+        pages[number] = page_rows
+        errors.extend(page_errors)
+    for number in sorted(pages):
+        rows.extend(pages[number])
+    truncated = len(rows) > max_records or pages_needed < last_page
+    rows = rows[:max_records]
+    if fields or drop_nulls or compact:
+        rows = _shape_rows(rows, fields, drop_nulls, compact)
+    return json_dumps({
+        'response': {
+            'data': rows,
+            'details': {
+                'page': {'fetched': pages_needed, 'last': last_page, 'limit': page_limit},
+                'totals': (first.get('details') or {}).get('totals'),
+                'truncated': truncated,
+                'upstream': current_upstream_stats(),
+            },
+            'errors': errors,
+        }
+    })
+
+
+def _first_row(raw):
+    resp = _response_body(json_loads(raw))
+    if isinstance(resp, dict):
+        data = resp.get('data')
+        if isinstance(data, list):
+            return data[0] if data else None
+        return data if data is not None else resp
+    return resp
+
+
+ # Helper that resolves many IDs with as few id[in] list requests as possible
+async def _get_by_ids(client, resource, ids):
+    unique_ids = list(dict.fromkeys(str(i).strip() for i in ids if str(i).strip()))
+    if len(unique_ids) > BULK_ID_MAX_IDS:
+        return f"Error: at most {BULK_ID_MAX_IDS} IDs can be looked up at once, got {len(unique_ids)}."
+    wanted = set(unique_ids)
+    results = {}
+    chunk_size = max(1, BULK_ID_CHUNK_SIZE)
+    chunks = [unique_ids[i:i + chunk_size] for i in range(0, len(unique_ids), chunk_size)]
+
+    async def fetch_chunk(chunk):
+        query_params = {'page[number]': 1, 'page[limit]': len(chunk)}
+        raw = await _do_get(client, f"/{resource}", query_params, {'search': f"id[in]={','.join(chunk)}"})
+        if not _is_ok_response(raw):
+            return []
+        try:
+            return list(_response_body(json_loads(raw)).get('data') or [])
+        except (ValueError, AttributeError):
+            return []
+
+    for rows in await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks)):
+        for row in rows:
+            if isinstance(row, dict) and row.get('id') in wanted:
+                results[row['id']] = row
+
+    # IDs the list endpoint did not return (failed chunk, filtered out) fall back to single GETs
+    semaphore = asyncio.Semaphore(max(1, BULK_ID_FALLBACK_CONCURRENCY))
+
+    async def fetch_one(id):
+        async with semaphore:
+            raw = await _cached_get(client, resource, f"/{resource}/{id}", {})
+        if not _is_ok_response(raw):
+            return id, {'error': raw}
+        try:
+            row = _first_row(raw)
+        except ValueError:
+            return id, {'error': raw}
+        return id, row if row is not None else {'error': 'Not found'}
+
+    missing = [id for id in unique_ids if id not in results]
+    results.update(await asyncio.gather(*(fetch_one(id) for id in missing)))
+    return json_dumps({id: results[id] for id in unique_ids})
 
 
 @mcp.tool(description="Show/Query/Get/Fetch/Retrieve a Merchant, an organization that processes credit card payments, each associated with an Entity.")
-async def getMerchants(ctx: Context, search: str = '', totals: str = '', page_number_: int = 0, page_limit_: int = 0) -> str:
+@upstream_meta
+@instrumented
+async def getMerchants(ctx: Context, search: str = '', totals: str = '', page_number_: int = 0, page_limit_: int = 0, fetch_all: bool = False, max_records_: int = 0, fields: list[str] = None, drop_nulls: bool = False, compact: bool = False) -> str:
     """
     Show/Query/Get/Fetch/Retrieve a Merchant, an organization that processes credit card payments, each associated with an Entity.
 
     Parameters:
         ctx (Context): The MCP context.
         request_token (str): Optional request token.
-        search (str): Search filter string. Use key[operator]=value format. Supported operators: equals, not, less, greater, like, in, etc.
-            Example: 'created[less]=2025-08-01' or 'name[like]=Acme'. Multiple conditions can be separated by & operator.
+        search (str): Search filter string. Use key[operator]=value format. Supported operators: equals, exact, less, greater, in, notin, like, notlike, diff.
+            Example: 'created[less]=20250801' or 'dba[like]=Acme%25'. Multiple conditions can be separated by & operator.
             Examples:
-                - 'created[less]=2025-08-01'
-                - 'name[like]=Acme'
-                - 'status[equals]=active'
-                - 'created[greater]=2024-01-01&status[equals]=active'
+                - 'created[less]=20250801'
+                - 'dba[like]=Acme%25'
+                - 'status[equals]=1'
+                - 'created[greater]=20240101&status[equals]=1'
         totals (str): If 'true', include total count in response.
         page_number_ (int): Page number for pagination.
         page_limit_ (int): Page size for pagination.
+        fetch_all (bool): If true, fetch every page concurrently and return the merged rows in order.
+        max_records_ (int): Maximum number of rows returned in fetch_all mode.
+        fields (list[str]): Only return these fields of each merchant, e.g. ['id', 'dba', 'status'].
+        drop_nulls (bool): If true, omit fields whose value is null.
+        compact (bool): If true, return data as {'columns': [...], 'rows': [[...], ...]} instead of one object per row.
 
     Returns:
         str: JSON string of merchant data or error message.
         ## merchantsResponse properties (property | type):
         #  id | string, created | string (YYYY-MM-DD HH:MM:SS.SSSS), modified | string (YYYY-MM-DD HH:MM:SS.SSSS), creator | string, modifier | string, lastActivity | string (YYYY-MM-DD HH:MM:SS), totalApprovedSales | integer (int64), entity | string, dba | string (0-50 chars), new | integer (0 or 1), incrementalAuthSupported | integer (0 or 1), seasonal | integer (0 or 1), advancedBilling | integer (0 or 1), established | integer (YYYYMMDD), annualCCSales | integer (int64), annualCCSaleVolume | integer (int64), annualACHSaleVolume | integer (int64), amexVolume | integer (int64), avgTicket | integer (int64), amex | string (1-15 chars), discover | string (1-15 chars), mcc | string, visaMvv | string, visaDisclosure | integer (0 or 1), disclosureIP | string, disclosureDate | integer (YYYYMMDD), environment | string (e.g., supermarket, moto, cardPresent, etc.), status | integer (0-6), autoBoarded | integer (0 or 1), statusReason | string, accountClosureReasonCode | string, accountClosureReasonDate | integer (YYYYMMDD), riskLevel | string (restricted, prohibited, high, medium, low), creditRatio | integer (int32), creditTimeliness | integer (int32), chargebackRatio | integer (int32), ndxDays | integer (int32), ndxPercentage | integer (int32), boarded | integer (int32), saqType | string (SAQ-A, SAQ-A-EP, SAQ-B, SAQ-B-IP, SAQ-C-VT, SAQ-C, SAQ-P2PE-HW, SAQ-D), saqDate | integer (YYYYMMDD), qsa | string, letterStatus | integer (0 or 1), letterDate | integer (YYYYMMDD), tcAttestation | integer (0 or 1), tmxSessionId | string, chargebackNotificationEmail | string, locationType | string (77, 78, 79, 80, 81), percentKeyed | integer (int32), totalVolume | integer (int64), percentEcomm | integer (int32), percentBusiness | integer (int32), applePayActive | integer (0 or 1), applePayStatus | string, googlePayActive | integer (0 or 1), naics | string (see NAICS codes), naicsDescription | string, expressBatchCloseMethod | string (TimeInitiated, MerchantInitiated), expressBatchCloseTime | string, passTokenEnabled | integer (0 or 1), inactive | integer (0 or 1), frozen | integer (0 or 1)
     """
-    async with await get_http_client() as client:
-        url = "/merchants"
-        query_params = {}
-        headers = {}
-        if page_number_ is not None:
-            query_params['page[number]'] = page_number_
-        if page_limit_ is not None:
-            query_params['page[limit]'] = page_limit_
-        if search:
-            if isinstance(search, str):
-                headers['search'] = search
-                logging.info(f"[DEBUG] Merchants search header: {headers['search']}")
-        if totals:
-            headers['totals'] = str(totals).lower()
-        raw = await _do_get(client, url, query_params, headers)
-        try:
-            import json
-            resp = json.loads(raw)
-            if isinstance(resp, dict) and 'data' in resp and not resp['data']:
-                return "No merchants found for the given criteria."
-        except Exception:
-            pass
-        return raw
+    track_upstream()
+    client = await get_http_client()
+    url = "/merchants"
+    query_params = {}
+    headers = {}
+    if page_number_ is not None:
+        query_params['page[number]'] = page_number_
+    if page_limit_ is not None:
+        query_params['page[limit]'] = page_limit_
+    search, error = _compile_search('merchants', search)
+    if error:
+        return error
+    if search:
+        if isinstance(search, str):
+            headers['search'] = search
+            logging.info(f"[DEBUG] Merchants search header: {headers['search']}")
+    if totals:
+        headers['totals'] = str(totals).lower()
+    if fetch_all:
+        return await _get_all_pages(ctx, client, url, headers, page_limit_, max_records_, "No merchants found for the given criteria.", fields, drop_nulls, compact)
+    raw = await _do_get(client, url, query_params, headers)
+    return await _format_list_response(raw, "No merchants found for the given criteria.", fields, drop_nulls, compact)
 
 
 @mcp.tool(description="Show/Query/Get/Fetch/Retrieve a Merchant by Id, which is an organization that processes credit card payments and each is associated with an Entity.")
-async def getMerchantsId(id: str, ctx: Context, search: str = '') -> str:
+@upstream_meta
+@instrumented
+async def getMerchantsId(id: str, ctx: Context, search: str = '', refresh: bool = False) -> str:
     """
     Show/Query/Get/Fetch/Retrieve a Merchant, an organization that processes credit card payments, each associated with an Entity.
 
     Parameters:
         ctx (Context): The MCP context.
         request_token (str): Optional request token.
-        search (str): Search filter string. Use key[operator]=value format. Supported operators: equals, not, less, greater, like, in, etc.
-            Example: 'created[less]=2025-08-01' or 'name[like]=Acme'. Multiple conditions can be separated by & operator.
+        search (str): Search filter string. Use key[operator]=value format. Supported operators: equals, exact, less, greater, in, notin, like, notlike, diff.
+            Example: 'created[less]=20250801' or 'dba[like]=Acme%25'. Multiple conditions can be separated by & operator.
             Examples:
-                - 'created[less]=2025-08-01'
-                - 'name[like]=Acme'
-                - 'status[equals]=active'
-                - 'created[greater]=2024-01-01&status[equals]=active'
+                - 'created[less]=20250801'
+                - 'dba[like]=Acme%25'
+                - 'status[equals]=1'
+                - 'created[greater]=20240101&status[equals]=1'
+        refresh (bool): If true, bypass the response cache and fetch a fresh copy.
     Returns:
         str: JSON string of merchant data or error message.
         ## merchantsResponse properties (property | type):
         #  id | string, created | string (YYYY-MM-DD HH:MM:SS.SSSS), modified | string (YYYY-MM-DD HH:MM:SS.SSSS), creator | string, modifier | string, lastActivity | string (YYYY-MM-DD HH:MM:SS), totalApprovedSales | integer (int64), entity | string, dba | string (0-50 chars), new | integer (0 or 1), incrementalAuthSupported | integer (0 or 1), seasonal | integer (0 or 1), advancedBilling | integer (0 or 1), established | integer (YYYYMMDD), annualCCSales | integer (int64), annualCCSaleVolume | integer (int64), annualACHSaleVolume | integer (int64), amexVolume | integer (int64), avgTicket | integer (int64), amex | string (1-15 chars), discover | string (1-15 chars), mcc | string, visaMvv | string, visaDisclosure | integer (0 or 1), disclosureIP | string, disclosureDate | integer (YYYYMMDD), environment | string (e.g., supermarket, moto, cardPresent, etc.), status | integer (0-6), autoBoarded | integer (0 or 1), statusReason | string, accountClosureReasonCode | string, accountClosureReasonDate | integer (YYYYMMDD), riskLevel | string (restricted, prohibited, high, medium, low), creditRatio | integer (int32), creditTimeliness | integer (int32), chargebackRatio | integer (int32), ndxDays | integer (int32), ndxPercentage | integer (int32), boarded | integer (int32), saqType | string (SAQ-A, SAQ-A-EP, SAQ-B, SAQ-B-IP, SAQ-C-VT, SAQ-C, SAQ-P2PE-HW, SAQ-D), saqDate | integer (YYYYMMDD), qsa | string, letterStatus | integer (0 or 1), letterDate | integer (YYYYMMDD), tcAttestation | integer (0 or 1), tmxSessionId | string, chargebackNotificationEmail | string, locationType | string (77, 78, 79, 80, 81), percentKeyed | integer (int32), totalVolume | integer (int64), percentEcomm | integer (int32), percentBusiness | integer (int32), applePayActive | integer (0 or 1), applePayStatus | string, googlePayActive | integer (0 or 1), naics | string (see NAICS codes), naicsDescription | string, expressBatchCloseMethod | string (TimeInitiated, MerchantInitiated), expressBatchCloseTime | string, passTokenEnabled | integer (0 or 1), inactive | integer (0 or 1), frozen | integer (0 or 1)
     """
-    async with await get_http_client() as client:
-        url = "/merchants/{id}"
-        if id is not None:
-            url = url.replace('{id}', str(id))
-        headers = {}
-        if search:
-            headers['search'] = search
-        return await _do_get(client, url, headers=headers)
+    track_upstream()
+    client = await get_http_client()
+    url = "/merchants/{id}"
+    if id is not None:
+        url = url.replace('{id}', str(id))
+    search, error = _compile_search('merchants', search)
+    if error:
+        return error
+    headers = {}
+    if search:
+        headers['search'] = search
+    return await _cached_get(client, 'merchants', url, headers, refresh)
 
 
 @mcp.tool(description="Show/Query/Get/Fetch/Retrieve a Transaction. Transactions hold all of the information relating to a particular credit card transaction, including the merchant, token, subscription, customer and card information.")
-async def getTxns(ctx: Context, search: str = '', totals: str = '', page_number_: int = 0, page_limit_: int = 0) -> str:
+@upstream_meta
+@instrumented
+async def getTxns(ctx: Context, search: str = '', totals: str = '', page_number_: int = 0, page_limit_: int = 0, fetch_all: bool = False, max_records_: int = 0, fields: list[str] = None, drop_nulls: bool = False, compact: bool = False) -> str:
     """
     Show/Query/Get/Fetch/Retrieve a Transaction. Transactions hold all of the information relating to a particular credit card transaction, including the merchant, token, subscription, customer and card information.
 
         Parameters:
             ctx (Context): The MCP context.
             request_token (str): Optional request token.
-            search (str): Search filter string. Use key[operator]=value format. Supported operators: equals, not, less, greater, like, in, etc.
-                Example: 'created[less]=2025-08-01' or 'name[like]=Acme'or 'merchant[equals]=p1_mer_688b17e778a020dfcf67a59'. Multiple conditions can be separated by & operator.
+            search (str): Search filter string. Use key[operator]=value format. Supported operators: equals, exact, less, greater, in, notin, like, notlike, diff.
+                Example: 'created[less]=20250801' or 'description[like]=Acme%25' or 'merchant[equals]=p1_mer_688b17e778a020dfcf67a59'. Multiple conditions can be separated by & operator.
                 Examples:
-                    - 'created[less]=2025-08-01'
-                    - 'name[like]=Acme'
-                    - 'status[equals]=active'
-                    - 'created[greater]=2024-01-01&status[equals]=active'
+                    - 'created[less]=20250801'
+                    - 'description[like]=Acme%25'
+                    - 'status[equals]=1'
+                    - 'created[greater]=20240101&status[equals]=1'
                     - 'merchant[equals]=p1_mer_688b17e778a020dfcf67a59'
             totals (str): If 'true', include total count in response.
             page_number_ (int): Page number for pagination.
             page_limit_ (int): Page size for pagination.
+            fetch_all (bool): If true, fetch every page concurrently and return the merged rows in order.
+            max_records_ (int): Maximum number of rows returned in fetch_all mode.
+            fields (list[str]): Only return these fields of each transaction, e.g. ['id', 'merchant', 'total', 'status'].
+            drop_nulls (bool): If true, omit fields whose value is null.
+            compact (bool): If true, return data as {'columns': [...], 'rows': [[...], ...]} instead of one object per row.
 
         Returns:
             str: JSON string of transaction data or error message.
+                Results larger than RESULTS_SPILL_BYTES are stored instead and returned as {'result': {'handle', 'rows', 'pages', 'fields', 'first_page', ...}, 'preview': [first rows], 'details', 'errors'}.
+                Read the rows page by page from the results://{handle}/page/{n} resource before the handle expires.
             # txnsResponse properties (property | type):
             # id | string, created | string, modified | string, creator | string, modifier | string, ipCreated | string, ipModified | string, merchant | string, token | string, payment | string, fortxn | string, fromtxn | string, batch | string, subscription | string, statement | string, type | object, expiration | string, serviceCode | string, funded | integer, returned | string, currency | object, fundingCurrency | object, currencyConversion | object, convenienceFee | integer, fee | number, platform | object, authDate | integer, authCode | string, captured | string, settled | string, settledCurrency | object, settledTotal | integer, allowPartial | object, order | string, description | string, descriptor | string, traceNumber | integer, discount | integer, shipping | integer, duty | integer, terminal | string, terminalCapability | object, entryMode | object, origin | object, mobile | object, tax | integer, surcharge | integer, total | integer, cashback | integer, authorization | string, originalApproved | integer, approved | integer, authentication | string, authenticationId | string, cvv | integer, cvvStatus | object, swiped | object, emv | object, signature | object, pin | object, pinEntryCapability | object, unattended | object, cofType | object, copyReason | object, clientIp | string, first | string, middle | string, last | string, company | string, email | string, address1 | string, address2 | string, city | string, state | string, zip | string, country | object, phone | string, mid | string, status | object, refunded | integer, reserved | object, misused | object, checkStage | object, unauthReason | object, authTokenCustomer | string, channel | string, imported | object, requestSequence | integer, processedSequence | integer, debtRepayment | object, fundingEnabled | object, fbo | string, txnsession | string, inactive | object, frozen | object, tip | integer, softPosId | string, softPosDeviceTypeIndicator | string, networkTokenIndicator | object, txnRefs | array, pinlessDebitConversion | object
     """
-    async with await get_http_client() as client:
-        url = "/txns"
-        query_params = {}
-        headers = {}
-        if page_number_ is not None:
-            query_params['page[number]'] = page_number_
-        if page_limit_ is not None:
-            query_params['page[limit]'] = page_limit_
-        if search:
-            if isinstance(search, str):
-                headers['search'] = search
-                logging.info(f"[DEBUG] Txns search header: {headers['search']}")
-        if totals:
-            headers['totals'] = str(totals).lower()
-        raw = await _do_get(client, url, query_params, headers)
-        try:
-            import json
-            resp = json.loads(raw)
-            if isinstance(resp, dict) and 'data' in resp and not resp['data']:
-                return "No transactions found for the given criteria."
-        except Exception:
-            pass
-        return raw
-        return await _do_get(client, url)
+    track_upstream()
+    client = await get_http_client()
+    url = "/txns"
+    query_params = {}
+    headers = {}
+    if page_number_ is not None:
+        query_params['page[number]'] = page_number_
+    if page_limit_ is not None:
+        query_params['page[limit]'] = page_limit_
+    search, error = _compile_search('txns', search)
+    if error:
+        return error
+    if search:
+        if isinstance(search, str):
+            headers['search'] = search
+            logging.info(f"[DEBUG] Txns search header: {headers['search']}")
+    if totals:
+        headers['totals'] = str(totals).lower()
+    if fetch_all:
+        return await _get_all_pages(ctx, client, url, headers, page_limit_, max_records_, "No transactions found for the given criteria.", fields, drop_nulls, compact, spill_resource='txns')
+    raw = await _do_get(client, url, query_params, headers)
+    return await _format_list_response(raw, "No transactions found for the given criteria.", fields, drop_nulls, compact, spill_resource='txns')
 
 @mcp.tool(description="Show/Query/Get/Fetch/Retrieve a Transaction by Id. Transactions hold all of the information relating to a particular credit card transaction, including the merchant, token, subscription, customer and card information.")
-async def getTxnsId(id: str, ctx: Context, search: str = '') -> str:
+@upstream_meta
+@instrumented
+async def getTxnsId(id: str, ctx: Context, search: str = '', refresh: bool = False) -> str:
     """
     Show/Query/Get/Fetch/Retrieve a Transaction. Transactions hold all of the information relating to a particular credit card transaction, including the merchant, token, subscription, customer and card information.
 
         Parameters:
             ctx (Context): The MCP context.
             request_token (str): Optional request token.
-            search (str): Search filter string. Use key[operator]=value format. Supported operators: equals, not, less, greater, like, in, etc.
-                Example: 'created[less]=2025-08-01' or 'name[like]=Acme'or 'merchant[equals]=p1_mer_688b17e778a020dfcf67a59'. Multiple conditions can be separated by & operator.
+            search (str): Search filter string. Use key[operator]=value format. Supported operators: equals, exact, less, greater, in, notin, like, notlike, diff.
+                Example: 'created[less]=20250801' or 'description[like]=Acme%25' or 'merchant[equals]=p1_mer_688b17e778a020dfcf67a59'. Multiple conditions can be separated by & operator.
                 Examples:
-                    - 'created[less]=2025-08-01'
-                    - 'name[like]=Acme'
-                    - 'status[equals]=active'
-                    - 'created[greater]=2024-01-01&status[equals]=active'
+                    - 'created[less]=20250801'
+                    - 'description[like]=Acme%25'
+                    - 'status[equals]=1'
+                    - 'created[greater]=20240101&status[equals]=1'
                     - 'merchant[equals]=p1_mer_688b17e778a020dfcf67a59'
+            refresh (bool): If true, bypass the response cache and fetch a fresh copy.
         Returns:
             str: JSON string of transaction data or error message.
             # txnsResponse properties (property | type):
             # id | string, created | string, modified | string, creator | string, modifier | string, ipCreated | string, ipModified | string, merchant | string, token | string, payment | string, fortxn | string, fromtxn | string, batch | string, subscription | string, statement | string, type | object, expiration | string, serviceCode | string, funded | integer, returned | string, currency | object, fundingCurrency | object, currencyConversion | object, convenienceFee | integer, fee | number, platform | object, authDate | integer, authCode | string, captured | string, settled | string, settledCurrency | object, settledTotal | integer, allowPartial | object, order | string, description | string, descriptor | string, traceNumber | integer, discount | integer, shipping | integer, duty | integer, terminal | string, terminalCapability | object, entryMode | object, origin | object, mobile | object, tax | integer, surcharge | integer, total | integer, cashback | integer, authorization | string, originalApproved | integer, approved | integer, authentication | string, authenticationId | string, cvv | integer, cvvStatus | object, swiped | object, emv | object, signature | object, pin | object, pinEntryCapability | object, unattended | object, cofType | object, copyReason | object, clientIp | string, first | string, middle | string, last | string, company | string, email | string, address1 | string, address2 | string, city | string, state | string, zip | string, country | object, phone | string, mid | string, status | object, refunded | integer, reserved | object, misused | object, checkStage | object, unauthReason | object, authTokenCustomer | string, channel | string, imported | object, requestSequence | integer, processedSequence | integer, debtRepayment | object, fundingEnabled | object, fbo | string, txnsession | string, inactive | object, frozen | object, tip | integer, softPosId | string, softPosDeviceTypeIndicator | string, networkTokenIndicator | object, txnRefs | array, pinlessDebitConversion | object
     """
-    async with await get_http_client() as client:
-        url = "/txns/{id}"
-        if id is not None:
-                    url = url.replace('{id}', str(id))
-        headers = {}
-        if search:
-            headers['search'] = search
-        return await _do_get(client, url, headers=headers)
+    track_upstream()
+    client = await get_http_client()
+    url = "/txns/{id}"
+    if id is not None:
+        url = url.replace('{id}', str(id))
+    search, error = _compile_search('txns', search)
+    if error:
+        return error
+    headers = {}
+    if search:
+        headers['search'] = search
+    return await _cached_get(client, 'txns', url, headers, refresh)
+
+
+@mcp.tool(description="Show/Query/Get/Fetch/Retrieve many Merchants by Id in one call. Returns a map of merchant Id to merchant record or error.")
+@upstream_meta
+@instrumented
+async def getMerchantsByIds(ids: list[str], ctx: Context) -> str:
+    """
+    Show/Query/Get/Fetch/Retrieve many Merchants by Id in one call.
+
+    Parameters:
+        ids (list[str]): Merchant IDs to look up. Duplicates are ignored.
+        ctx (Context): The MCP context.
+    Returns:
+        str: JSON object mapping each merchant ID to its merchantsResponse record, or to {"error": ...}.
+    """
+    track_upstream()
+    client = await get_http_client()
+    return await _get_by_ids(client, 'merchants', ids)
+
+
+@mcp.tool(description="Show/Query/Get/Fetch/Retrieve many Transactions by Id in one call. Returns a map of transaction Id to transaction record or error.")
+@upstream_meta
+@instrumented
+async def getTxnsByIds(ids: list[str], ctx: Context) -> str:
+    """
+    Show/Query/Get/Fetch/Retrieve many Transactions by Id in one call.
+
+        Parameters:
+            ids (list[str]): Transaction IDs to look up. Duplicates are ignored.
+            ctx (Context): The MCP context.
+        Returns:
+            str: JSON object mapping each transaction ID to its txnsResponse record, or to {"error": ...}.
+    """
+    track_upstream()
+    client = await get_http_client()
+    return await _get_by_ids(client, 'txns', ids)
+
+
+@mcp.tool(description="Aggregate Transactions server-side. Groups transactions matching a search filter by merchant, status, type, currency or created_day and returns a compact summary table of count and sum/avg/min/max of total, refunded or fee.")
+@upstream_meta
+@instrumented
+async def aggregateTxns(ctx: Context, search: str = '', group_by: list[str] = None, metrics: list[str] = None, max_records_: int = 0) -> str:
+    """
+    Aggregate Transactions server-side without returning the raw rows.
+
+        Parameters:
+            ctx (Context): The MCP context.
+            search (str): Search filter string. Use key[operator]=value format, same as getTxns.
+                Examples:
+                    - 'created[greater]=20250701'
+                    - 'merchant[equals]=p1_mer_688b17e778a020dfcf67a59&created[greater]=20250701'
+            group_by (list[str]): Fields to group by: merchant, status, type, currency, created_day. Empty for one overall row.
+            metrics (list[str]): 'count' or <sum|avg|min|max>_<total|refunded|fee>, e.g. ['count', 'sum_total', 'avg_fee']. Defaults to ['count'].
+            max_records_ (int): Maximum number of transactions scanned.
+
+        Returns:
+            str: JSON object with 'columns', 'rows' (one value array per group), 'rows_scanned' and 'truncated', or an error message.
+    """
+    track_upstream()
+    try:
+        aggregator = TxnAggregator(group_by or [], metrics or ['count'])
+    except ValueError as e:
+        return f"Error: {e}"
+    client = await get_http_client()
+    url = "/txns"
+    search, error = _compile_search('txns', search)
+    if error:
+        return error
+    headers = {'totals': 'true'}
+    if search:
+        headers['search'] = search
+        logging.info(f"[DEBUG] Aggregate txns search header: {headers['search']}")
+    page_limit = PAGINATION_PAGE_LIMIT
+    max_records = max_records_ or AGGREGATE_MAX_RECORDS
+    first, error, last_page, pages_needed = await _first_page(ctx, client, url, headers, page_limit, max_records)
+    if first is None:
+        return error
+    errors = list(first.get('errors') or [])
+    # Fold each page as soon as it arrives so raw rows are never accumulated
+    aggregator.add_rows(first.get('data') or [])
+    async for _, page_rows, page_errors in _iter_pages(ctx, client, url, headers, 2, pages_needed, page_limit):
+        aggregator.add_rows(page_rows)
+        errors.extend(page_errors)
+    summary = aggregator.summary()
+    summary['truncated'] = pages_needed < last_page
+    summary['errors'] = errors
+    summary['upstream'] = current_upstream_stats()
+    return json_dumps(summary)
+
+
+# Opened on first use so the SQLite file is only created when the mirror is enabled
+_mirror = None
+_mirror_locks = {}
+
+
+def _get_mirror():
+    global _mirror
+    if _mirror is None:
+        _mirror = LocalMirror(MIRROR_PATH)
+    return _mirror
+
+
+ # Pulls rows modified since the last complete sync into the local mirror
+async def _sync_mirror(ctx, client, resource, full=False):
+    mirror = _get_mirror()
+    lock = _mirror_locks.setdefault(resource, asyncio.Lock())
+    async with lock:
+        started = time.time()
+        watermark = None if full else await asyncio.to_thread(mirror.watermark, resource)
+        # Oldest changes first, so a capped sync can still advance the watermark safely
+        search = 'modified[sort]=asc'
+        if watermark:
+            # greater is strict and day-granular, so the watermark day is read again; upserts absorb the overlap
+            day = datetime.datetime.strptime(watermark[:10], '%Y-%m-%d') - datetime.timedelta(days=1)
+            search = f"modified[greater]={day:%Y%m%d}&{search}"
+        headers = {'search': search, 'totals': 'true'}
+        url = f"/{resource}"
+        page_limit = PAGINATION_PAGE_LIMIT
+        first, error, last_page, pages_needed = await _first_page(ctx, client, url, headers, page_limit, MIRROR_SYNC_MAX_RECORDS)
+        if first is None:
+            return None, error
+        synced = await asyncio.to_thread(mirror.upsert, resource, first.get('data') or [])
+        errors = list(first.get('errors') or [])
+        async for _, page_rows, page_errors in _iter_pages(ctx, client, url, headers, 2, pages_needed, page_limit):
+            synced += await asyncio.to_thread(mirror.upsert, resource, page_rows)
+            errors.extend(page_errors)
+        # A sync capped at MIRROR_SYNC_MAX_RECORDS advances the watermark but is not complete
+        await asyncio.to_thread(mirror.mark_synced, resource, started, synced, not errors, pages_needed >= last_page)
+        state = await asyncio.to_thread(mirror.state, resource)
+        state.update({
+            'synced_rows': synced,
+            'incremental': bool(watermark),
+            'errors': errors,
+            'upstream': current_upstream_stats(),
+        })
+        return state, None
+
+
+def _mirror_unavailable(resource):
+    if not MIRROR_ENABLED:
+        return "Error: the local mirror is disabled. Set MIRROR_ENABLED=true to use syncMirror and queryMirror."
+    if resource not in INDEXED_FIELDS:
+        return f"Error: unknown mirror resource '{resource}'. Use one of: {', '.join(INDEXED_FIELDS)}."
+    return None
+
+
+@mcp.tool(description="Sync the local mirror of Payrix transactions or merchants. Only rows modified since the last sync are fetched, unless full is true.")
+@upstream_meta
+@instrumented
+async def syncMirror(ctx: Context, resource: str = 'txns', full: bool = False) -> str:
+    """
+    Sync the local SQLite mirror of Payrix transactions or merchants.
+
+        Parameters:
+            ctx (Context): The MCP context.
+            resource (str): 'txns' or 'merchants'.
+            full (bool): If true, ignore the watermark and re-read everything.
+
+        Returns:
+            str: JSON object with the mirror state (rows, watermark, synced_at, complete, complete_at) and the number of rows synced, or an error message.
+    """
+    track_upstream()
+    error = _mirror_unavailable(resource)
+    if error:
+        return error
+    client = await get_http_client()
+    state, error = await _sync_mirror(ctx, client, resource, full)
+    if state is None:
+        return error
+    return json_dumps(state)
+
+
+@mcp.tool(description="Query the local mirror of Payrix transactions or merchants with the same search syntax as getTxns/getMerchants. Answers in milliseconds without calling the API; the result reports how stale the mirror is.")
+@upstream_meta
+@instrumented
+async def queryMirror(ctx: Context, resource: str = 'txns', search: str = '', limit: int = 100, offset: int = 0, fields: list[str] = None, drop_nulls: bool = False, compact: bool = False, max_staleness_: int = 0) -> str:
+    """
+    Query the local SQLite mirror of Payrix transactions or merchants.
+
+        Parameters:
+            ctx (Context): The MCP context.
+            resource (str): 'txns' or 'merchants'.
+            search (str): Search filter string in key[operator]=value format, same as getTxns. Advanced and/or expressions are not supported.
+                Examples:
+                    - 'created[greater]=20250701&merchant[equals]=p1_mer_688b17e778a020dfcf67a59'
+                    - 'status[in]=1,3&total[greater]=10000&created[sort]=asc'
+            limit (int): Maximum number of rows returned.
+            offset (int): Number of matching rows to skip.
+            fields (list[str]): Only return these fields of each row.
+            drop_nulls (bool): If true, omit fields whose value is null.
+            compact (bool): If true, return data as {'columns': [...], 'rows': [[...], ...]}.
+            max_staleness_ (int): Sync first when the mirror is older than this many seconds. 0 uses the server default, negative never syncs.
+
+        Returns:
+            str: JSON object with 'data', 'total' (matching rows) and 'mirror' staleness metadata ('complete' tells whether the last sync
+                got every page; 'age_seconds' and 'stale' count from the last complete sync), or an error message.
+    """
+    track_upstream()
+    error = _mirror_unavailable(resource)
+    if error:
+        return error
+    try:
+        conditions, passthrough = parse_search(resource, search)
+    except SearchError as e:
+        return f"Error: {e}"
+    if passthrough:
+        return "Error: advanced and/or search expressions are not supported by the local mirror."
+    mirror = _get_mirror()
+    max_staleness = max_staleness_ or MIRROR_MAX_STALENESS
+    state = await asyncio.to_thread(mirror.state, resource)
+    sync_error = None
+    if max_staleness >= 0 and (state['age_seconds'] is None or state['age_seconds'] > max_staleness):
+        client = await get_http_client()
+        synced, sync_error = await _sync_mirror(ctx, client, resource)
+        if synced is not None:
+            state = await asyncio.to_thread(mirror.state, resource)
+    total, rows = await asyncio.to_thread(mirror.query, resource, conditions, max(0, limit), max(0, offset))
+    if fields or drop_nulls or compact:
+        rows = _shape_rows(rows, fields, drop_nulls, compact)
+    state['max_staleness'] = max_staleness
+    state['stale'] = state['age_seconds'] is None or (max_staleness >= 0 and state['age_seconds'] > max_staleness)
+    if sync_error:
+        state['sync_error'] = sync_error
+    return json_dumps({'data': rows, 'total': total, 'mirror': state})
@@ -0,0 +1,48 @@
+import asyncio
+import json
+
+import calculator
+from tools.batch import evaluate_batch
+
+
+def test_nested_power_is_rejected_quickly():
+    [result] = evaluate_batch(["((9**999)**999)**999"])
+    assert result["error"] == "Overflow"
+
+
+def test_power_beyond_str_limit_fails_only_its_expression():
+    results = evaluate_batch(["(9**999)**999", "1 + 2"])
+    assert results[0]["error"] == "Overflow"
+    assert results[1]["value"] == 3
+
+
+def test_batch_tool_keeps_other_results_on_overflow():
+    result = asyncio.run(calculator.mcp.call_tool(
+        "batch_tool", {"expressions": ["(9**999)**999", "((9**999)**999)**999", "2 * 3"]}
+    ))
+    content = result[0] if isinstance(result, tuple) else result
+    values = [json.loads(block.text) for block in content]
+    assert [value.get("error") for value in values[:2]] == ["Overflow", "Overflow"]
+    assert values[2]["value"] == 6
+
+
+def test_long_array_with_huge_integer_stays_exact():
+    [result] = evaluate_batch(["sum(x)"], {"x": [10**400] + [1] * 40})
+    assert result["value"] == 10**400 + 40
+
+
+def test_long_array_keeps_integer_precision():
+    [long] = evaluate_batch(["sum(x)"], {"x": [2**60 + 1] + [0] * 40})
+    [short] = evaluate_batch(["sum(x)"], {"x": [2**60 + 1] + [0] * 4})
+    assert long["value"] == short["value"] == 2**60 + 1
+
+
+def test_huge_literal_fails_only_its_expression():
+    results = evaluate_batch(["x * 10**400", "sum(x)"], {"x": [1.5] * 40})
+    assert results[0]["error"] == "Overflow"
+    assert results[1]["value"] == 60
+
+
+def test_sum_and_count_of_empty_array_are_zero():
+    results = evaluate_batch(["sum(x)", "count(x)"], {"x": []})
+    assert [result["value"] for result in results] == [0, 0]
@@ -0,0 +1,129 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from mcp_scheduler import CircuitOpenError, RequestScheduler
+
+
+def _client(handler):
+    return httpx.AsyncClient(base_url="http://payrix.test", transport=httpx.MockTransport(handler))
+
+
+def _sequence(*statuses, retry_after=None):
+    calls = []
+    statuses = iter(statuses)
+
+    def handler(request):
+        calls.append(time.monotonic())
+        status = next(statuses)
+        headers = {"Retry-After": retry_after} if status == 429 and retry_after else {}
+        return httpx.Response(status, headers=headers)
+    return handler, calls
+
+
+def test_retry_after_is_waited_out_beyond_backoff_max():
+    handler, calls = _sequence(429, 200, retry_after="0.3")
+    scheduler = RequestScheduler(rate=0, backoff_base=0.01, backoff_max=0.01)
+
+    async def run():
+        async with _client(handler) as client:
+            return await scheduler.get(client, "/txns")
+    response = asyncio.run(run())
+    assert response.status_code == 200
+    assert calls[1] - calls[0] >= 0.3
+    assert scheduler.counters["rate_limited"] == 1
+
+
+def test_retry_after_above_limit_returns_the_429():
+    handler, calls = _sequence(429, 200, retry_after="30")
+    scheduler = RequestScheduler(rate=0, backoff_base=0.01, retry_after_max=1)
+
+    async def run():
+        async with _client(handler) as client:
+            return await scheduler.get(client, "/txns")
+    assert asyncio.run(run()).status_code == 429
+    assert len(calls) == 1
+
+
+def test_breaker_opens_then_closes_after_a_successful_trial():
+    handler, _ = _sequence(500, 500, 200)
+    scheduler = RequestScheduler(rate=0, max_retries=0, failure_threshold=2, reset_timeout=0.1)
+
+    async def run():
+        async with _client(handler) as client:
+            for _ in range(2):
+                assert (await scheduler.get(client, "/txns")).status_code == 500
+            assert scheduler.breaker.state == "open"
+            with pytest.raises(CircuitOpenError):
+                await scheduler.get(client, "/txns")
+            await asyncio.sleep(0.15)
+            assert (await scheduler.get(client, "/txns")).status_code == 200
+    asyncio.run(run())
+    assert scheduler.breaker.state == "closed"
+    assert scheduler.counters["rejected_open_circuit"] == 1
+
+
+def test_breaker_reopens_when_the_trial_fails():
+    handler, _ = _sequence(500, 500)
+    scheduler = RequestScheduler(rate=0, max_retries=0, failure_threshold=1, reset_timeout=0.05)
+
+    async def run():
+        async with _client(handler) as client:
+            await scheduler.get(client, "/txns")
+            await asyncio.sleep(0.1)
+            await scheduler.get(client, "/txns")
+    asyncio.run(run())
+    assert scheduler.breaker.state == "open"
+    assert scheduler.breaker.times_opened == 2
+
+
+def test_cancelled_trial_is_released():
+    scheduler = RequestScheduler(rate=0, max_retries=0, failure_threshold=1, reset_timeout=0.05)
+    scheduler.breaker.record_failure()
+
+    async def slow(request):
+        await asyncio.sleep(1)
+        return httpx.Response(200)
+
+    async def run():
+        await asyncio.sleep(0.1)
+        async with _client(slow) as client:
+            trial = asyncio.ensure_future(scheduler.get(client, "/txns"))
+            await asyncio.sleep(0.05)
+            assert scheduler.breaker.state == "half_open"
+            trial.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await trial
+        assert scheduler.breaker.trial_started is None
+        async with _client(lambda request: httpx.Response(200)) as client:
+            assert (await scheduler.get(client, "/txns")).status_code == 200
+    asyncio.run(run())
+    assert scheduler.breaker.state == "closed"
+
+
+def test_rate_limited_trial_is_released():
+    handler, _ = _sequence(429, 200, retry_after="0")
+    scheduler = RequestScheduler(rate=0, max_retries=0, failure_threshold=1, reset_timeout=0.05)
+    scheduler.breaker.record_failure()
+
+    async def run():
+        await asyncio.sleep(0.1)
+        async with _client(handler) as client:
+            assert (await scheduler.get(client, "/txns")).status_code == 429
+            assert (await scheduler.get(client, "/txns")).status_code == 200
+    asyncio.run(run())
+    assert scheduler.breaker.state == "closed"
+
+
+def test_token_bucket_spaces_requests_past_the_burst():
+    handler, calls = _sequence(200, 200, 200, 200)
+    scheduler = RequestScheduler(rate=20, burst=2)
+
+    async def run():
+        async with _client(handler) as client:
+            await asyncio.gather(*(scheduler.get(client, "/txns") for _ in range(4)))
+    asyncio.run(run())
+    # Two requests use the burst, the other two wait 1/20 s for a token each
+    assert calls[-1] - calls[0] >= 0.09
@@ -0,0 +1,72 @@
+import pytest
+
+from mcp_search import SearchError, compile_search, parse_search
+
+
+def test_dates_are_normalized_to_yyyymmdd():
+    assert compile_search("txns", "created[greater]=2024-06-01") == "created[greater]=20240601"
+    assert compile_search("txns", "created[less]=20250801") == "created[less]=20250801"
+
+
+@pytest.mark.parametrize("value, message", [
+    ("2024-02-30", "not a valid calendar date"),
+    ("tomorrow", "is not a date"),
+])
+def test_invalid_dates_are_rejected(value, message):
+    with pytest.raises(SearchError, match=message):
+        parse_search("txns", f"created[greater]={value}")
+
+
+@pytest.mark.parametrize("value", ["abc", "10.5"])
+def test_integer_fields_reject_other_values(value):
+    with pytest.raises(SearchError, match="is not an integer"):
+        parse_search("txns", f"total[greater]={value}")
+
+
+def test_integer_values_are_canonical():
+    assert compile_search("txns", "total[greater]=0100") == "total[greater]=100"
+
+
+def test_typos_get_suggestions():
+    with pytest.raises(SearchError, match="did you mean 'status'"):
+        parse_search("txns", "stauts[equals]=1")
+    with pytest.raises(SearchError, match="did you mean 'equals'"):
+        parse_search("txns", "status[equls]=1")
+
+
+def test_every_problem_is_reported():
+    with pytest.raises(SearchError) as error:
+        parse_search("txns", "stauts[equals]=1&total[greater]=abc&bogus")
+    message = str(error.value)
+    assert "stauts" in message and "abc" in message and "'bogus' is not in key[operator]=value format" in message
+
+
+def test_in_lists_are_sorted_and_deduplicated():
+    assert compile_search("txns", "status[in]=3, 1,2,3") == "status[in]=1,2,3"
+    assert compile_search("txns", "status[notin]=10,9") == "status[notin]=9,10"
+
+
+def test_filters_get_a_stable_order():
+    assert (compile_search("txns", "status[equals]=1&merchant[equals]=x")
+            == compile_search("txns", "merchant[equals]=x&status[equals]=1&status[equals]=1"))
+
+
+def test_sort_terms_keep_their_order_after_the_filters():
+    conditions, _ = parse_search("txns", "total[sort]=desc&status[equals]=1&created[sort]=ASC&total[sort]=asc")
+    assert conditions == [("status", "equals", "1"), ("total", "sort", "desc"), ("created", "sort", "asc")]
+
+
+def test_sort_values_are_checked():
+    with pytest.raises(SearchError, match="sort takes 'asc' or 'desc'"):
+        parse_search("txns", "created[sort]=up")
+
+
+def test_and_or_expressions_pass_through_unchecked():
+    conditions, passthrough = parse_search("txns", "and[0][status][equals]=1&or[1][total][greater]=5&total[greater]=5")
+    assert conditions == [("total", "greater", "5")]
+    assert passthrough == ["and[0][status][equals]=1", "or[1][total][greater]=5"]
+    assert compile_search("txns", "and[0][status][equals]=1&total[greater]=5") == "total[greater]=5&and[0][status][equals]=1"
+
+
+def test_empty_search():
+    assert parse_search("txns", "  ") == ([], [])
@@ -0,0 +1,433 @@
+import ast
+import math
+from functools import lru_cache
+from tools.arithmetic import add, subtract, multiply, divide
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, arrays are evaluated element by element without it
+    np = None
+
+# Batch expression engine: arithmetic expressions over numbers and arrays
+
+EXPRESSION_CACHE_SIZE = 256  # Compiled expressions kept for reuse
+MAX_EXPRESSION_LENGTH = 1000
+MAX_DEPTH = 100  # Deepest allowed nesting of operators and calls
+MAX_ARRAY_SIZE = 100000
+MAX_EXPONENT = 1000  # Largest integer exponent, keeps int ** int from running away
+# Largest integer result in bits (about 3000 digits), below Python's 4300-digit str() limit
+MAX_INT_BITS = 10000
+MAX_REPORTED_ERRORS = 100  # Per-element errors listed per expression
+NUMPY_MIN_SIZE = 32  # Smaller arrays are faster element by element
+MAX_EXACT_FLOAT_INT = 2 ** 53  # Larger integers lose precision as float64, so they stay on the Python path
+
+CONSTANTS = {"pi": math.pi, "e": math.e}
+REDUCTIONS = ("sum", "mean", "median", "min", "max", "count")
+
+
+class ExpressionError(ValueError):
+    """Raised for expressions that cannot be parsed or evaluated."""
+
+
+def _floor_divide(a, b):
+    if b == 0:
+        raise ValueError("Division by zero")
+    return a // b
+
+
+def _modulo(a, b):
+    if b == 0:
+        raise ValueError("Division by zero")
+    return a % b
+
+
+def _power(a, b):
+    if isinstance(a, int) and isinstance(b, int) and abs(b) > MAX_EXPONENT:
+        raise ValueError("Exponent too large")
+    if a == 0 and b < 0:
+        raise ValueError("Division by zero")
+    # Bound the result before computing it: a ** b needs about b * log2(|a|) bits
+    if isinstance(a, int) and isinstance(b, int) and b > 0 and abs(a) > 1 and b * math.log2(abs(a)) > MAX_INT_BITS:
+        raise OverflowError()
+    result = a ** b
+    if isinstance(result, complex):
+        raise ValueError("Math domain error")
+    return result
+
+
+def _sqrt(a):
+    if a < 0:
+        raise ValueError("Math domain error")
+    return math.sqrt(a)
+
+
+BINARY_OPERATORS = {
+    ast.Add: add,
+    ast.Sub: subtract,
+    ast.Mult: multiply,
+    ast.Div: divide,
+    ast.FloorDiv: _floor_divide,
+    ast.Mod: _modulo,
+    ast.Pow: _power,
+}
+
+if np is not None:
+    NUMPY_OPERATORS = {
+        ast.Add: np.add,
+        ast.Sub: np.subtract,
+        ast.Mult: np.multiply,
+        ast.Div: np.true_divide,
+        ast.FloorDiv: np.floor_divide,
+        ast.Mod: np.mod,
+        ast.Pow: np.power,
+    }
+
+
+class _Evaluation:
+    """State of one evaluation: whether arrays are NumPy arrays and the failed elements."""
+
+    def __init__(self, use_numpy):
+        self.use_numpy = use_numpy
+        self.errors = {}
+
+    def fail(self, index, message):
+        # The first error of an element is the one worth reporting
+        self.errors.setdefault(int(index), message)
+
+
+def _is_array(value):
+    return isinstance(value, list) or (np is not None and isinstance(value, np.ndarray))
+
+
+def _length(*values):
+    lengths = {len(value) for value in values if _is_array(value)}
+    if len(lengths) > 1:
+        raise ExpressionError(f"Array length mismatch: {', '.join(str(n) for n in sorted(lengths))}")
+    return lengths.pop()
+
+
+def _apply(func, *args):
+    result = func(*args)
+    if isinstance(result, float) and not math.isfinite(result):
+        raise OverflowError()
+    if isinstance(result, int) and result.bit_length() > MAX_INT_BITS:
+        # Keeps chains of products from growing integers without bound
+        raise OverflowError()
+    return result
+
+
+def _scalar(func, *args):
+    try:
+        return _apply(func, *args)
+    except (ValueError, ZeroDivisionError, OverflowError) as e:
+        raise ExpressionError(_error_message(e))
+
+
+def _error_message(error):
+    if isinstance(error, ZeroDivisionError):
+        return "Division by zero"
+    if isinstance(error, OverflowError):
+        return "Overflow"
+    return str(error)
+
+
+def _elementwise(state, func, numpy_func, *args):
+    """Applies func to scalars, or element by element when any argument is an array."""
+    if not any(_is_array(arg) for arg in args):
+        return _scalar(func, *args)
+    size = _length(*args)
+    if state.use_numpy:
+        return _numpy_elementwise(state, numpy_func, args)
+    columns = [arg if _is_array(arg) else [arg] * size for arg in args]
+    result = []
+    for index, items in enumerate(zip(*columns)):
+        if any(item is None for item in items):
+            result.append(None)
+            continue
+        try:
+            result.append(_apply(func, *items))
+        except (ValueError, ZeroDivisionError, OverflowError) as e:
+            state.fail(index, _error_message(e))
+            result.append(None)
+    return result
+
+
+def _numpy_elementwise(state, numpy_func, args):
+    # Failed elements are NaN; elements that turn NaN or infinite here are new failures
+    with np.errstate(all="ignore"):
+        result = np.asarray(numpy_func(*args), dtype=float)
+    failed = ~np.isfinite(result)
+    for arg in args:
+        if _is_array(arg):
+            failed &= ~np.isnan(arg)
+    if failed.any():
+        zero = np.zeros(result.shape, dtype=bool)
+        if numpy_func in (np.true_divide, np.floor_divide, np.mod):
+            zero = np.broadcast_to(args[1] == 0, result.shape)
+        elif numpy_func is np.power:
+            zero = np.broadcast_to((args[0] == 0) & (args[1] < 0), result.shape)
+        for index in np.flatnonzero(failed):
+            if zero[index]:
+                state.fail(index, "Division by zero")
+            elif np.isnan(result[index]):
+                state.fail(index, "Math domain error")
+            else:
+                state.fail(index, "Overflow")
+        result[failed] = np.nan
+    return result
+
+
+def _valid(value):
+    """Returns the elements of a value that did not fail."""
+    if not _is_array(value):
+        return [value]
+    if isinstance(value, list):
+        return [item for item in value if item is not None]
+    return value[~np.isnan(value)]
+
+
+def _percentile(values, q):
+    # Linear interpolation between closest ranks, the NumPy default
+    if not 0 <= q <= 100:
+        raise ExpressionError("Percentile must be between 0 and 100")
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def reduce_values(value, name, q=None):
+    """Reduces a scalar or array to one number, skipping failed elements."""
+    values = _valid(value)
+    if name == "count":
+        return len(values)
+    if len(values) == 0:
+        if name == "sum":
+            return 0
+        raise ExpressionError(f"{name}() of an array without valid elements")
+    if isinstance(values, list):
+        if name == "sum":
+            return math.fsum(values) if any(isinstance(v, float) for v in values) else sum(values)
+        if name == "mean":
+            return math.fsum(values) / len(values)
+        if name == "min":
+            return min(values)
+        if name == "max":
+            return max(values)
+        return _percentile(values, 50 if name == "median" else q)
+    if name == "percentile" and not 0 <= q <= 100:
+        raise ExpressionError("Percentile must be between 0 and 100")
+    numpy_reductions = {
+        "sum": np.sum, "mean": np.mean, "min": np.min, "max": np.max, "median": np.median,
+    }
+    if name == "percentile":
+        return float(np.percentile(values, q))
+    return float(numpy_reductions[name](values))
+
+
+def _call_min_max(state, name, args):
+    # min(x) / max(x) reduce an array, min(a, b, ...) compares element by element
+    if len(args) == 1:
+        return reduce_values(args[0], name)
+    func = min if name == "min" else max
+    numpy_func = None
+    if np is not None:
+        # minimum/maximum keep NaN, so failed elements stay failed
+        numpy_func = np.minimum if name == "min" else np.maximum
+    result = args[0]
+    for arg in args[1:]:
+        result = _elementwise(state, func, numpy_func, result, arg)
+    return result
+
+
+def _call(state, name, args):
+    if name in ("min", "max"):
+        if not args:
+            raise ExpressionError(f"{name}() needs at least one argument")
+        return _call_min_max(state, name, args)
+    if name == "percentile":
+        if len(args) != 2 or _is_array(args[1]):
+            raise ExpressionError("percentile() takes an array and a percentile between 0 and 100")
+        return reduce_values(args[0], name, args[1])
+    if name == "round":
+        if len(args) not in (1, 2) or (len(args) == 2 and (_is_array(args[1]) or args[1] != int(args[1]))):
+            raise ExpressionError("round() takes a value and optionally a whole number of digits")
+        digits = int(args[1]) if len(args) == 2 else 0
+        numpy_round = (lambda a: np.round(a, digits)) if np is not None else None
+        return _elementwise(state, lambda a: round(a, digits) if digits else round(a), numpy_round, args[0])
+    if len(args) != 1:
+        raise ExpressionError(f"{name}() takes exactly one argument")
+    if name in REDUCTIONS:
+        return reduce_values(args[0], name)
+    if name == "abs":
+        return _elementwise(state, abs, np.abs if np is not None else None, args[0])
+    return _elementwise(state, _sqrt, np.sqrt if np is not None else None, args[0])
+
+
+FUNCTIONS = ("abs", "sqrt", "round", "percentile") + REDUCTIONS
+
+
+def _compile(node, depth=0):
+    """Turns a whitelisted AST node into a function of (state, variables)."""
+    if depth > MAX_DEPTH:
+        raise ExpressionError("Expression is nested too deeply")
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        value = node.value
+        return lambda state, variables: value
+    if isinstance(node, ast.Name):
+        name = node.id
+        if name in CONSTANTS:
+            value = CONSTANTS[name]
+            return lambda state, variables: value
+
+        def load(state, variables):
+            if name not in variables:
+                raise ExpressionError(f"Unknown variable '{name}'")
+            return variables[name]
+        return load
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        operand = _compile(node.operand, depth + 1)
+        if isinstance(node.op, ast.UAdd):
+            return operand
+        negative = np.negative if np is not None else None
+        return lambda state, variables: _elementwise(state, lambda a: -a, negative, operand(state, variables))
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        left = _compile(node.left, depth + 1)
+        right = _compile(node.right, depth + 1)
+        func = BINARY_OPERATORS[type(node.op)]
+        numpy_func = NUMPY_OPERATORS[type(node.op)] if np is not None else None
+        return lambda state, variables: _elementwise(
+            state, func, numpy_func, left(state, variables), right(state, variables)
+        )
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        name = node.func.id
+        if name not in FUNCTIONS:
+            raise ExpressionError(f"Unknown function '{name}', expected one of: {', '.join(FUNCTIONS)}")
+        args = [_compile(arg, depth + 1) for arg in node.args]
+        return lambda state, variables: _call(state, name, [arg(state, variables) for arg in args])
+    if isinstance(node, ast.List):
+        items = [_compile(item, depth + 1) for item in node.elts]
+
+        def build(state, variables):
+            values = [item(state, variables) for item in items]
+            if any(_is_array(value) for value in values):
+                raise ExpressionError("Array literals can only hold numbers")
+            return _to_array(values, state.use_numpy)
+        return build
+    raise ExpressionError(f"Unsupported syntax: {type(node).__name__}")
+
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def compile_expression(expression):
+    """Parses and validates an expression once; repeated expressions reuse the compiled form."""
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"Expression is longer than {MAX_EXPRESSION_LENGTH} characters")
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except (SyntaxError, RecursionError) as e:
+        raise ExpressionError(f"Invalid expression: {getattr(e, 'msg', e)}")
+    return _compile(tree.body)
+
+
+def _to_array(values, use_numpy):
+    if use_numpy:
+        return np.asarray(values, dtype=float)
+    return list(values)
+
+
+def _fits_float(value):
+    """Whether every number of a variable converts to float64 without losing its value."""
+    items = value if isinstance(value, list) else [value]
+    return all(type(item) is float or abs(item) <= MAX_EXACT_FLOAT_INT for item in items)
+
+
+def _prepare_variables(variables, use_numpy):
+    prepared = {}
+    for name, value in (variables or {}).items():
+        if not name.isidentifier():
+            raise ExpressionError(f"Invalid variable name '{name}'")
+        if isinstance(value, list):
+            if len(value) > MAX_ARRAY_SIZE:
+                raise ExpressionError(f"Variable '{name}' has more than {MAX_ARRAY_SIZE} elements")
+            if not all(type(item) in (int, float) for item in value):
+                raise ExpressionError(f"Variable '{name}' must be a list of numbers")
+            if any(type(item) is int and item.bit_length() > MAX_INT_BITS for item in value):
+                raise ExpressionError(f"Variable '{name}' holds an integer larger than {MAX_INT_BITS} bits")
+            prepared[name] = _to_array(value, use_numpy)
+        elif type(value) in (int, float):
+            if type(value) is int and value.bit_length() > MAX_INT_BITS:
+                raise ExpressionError(f"Variable '{name}' is larger than {MAX_INT_BITS} bits")
+            prepared[name] = value
+        else:
+            raise ExpressionError(f"Variable '{name}' must be a number or a list of numbers")
+    return prepared
+
+
+def _to_output(value):
+    if np is not None and isinstance(value, np.ndarray):
+        return [None if math.isnan(item) else item for item in value.tolist()]
+    if np is not None and isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _parse_reduction(name):
+    # 'p95' and 'p99.9' are percentiles, everything else must be a named reduction
+    if name in REDUCTIONS:
+        return name, None
+    if name.startswith("p"):
+        try:
+            q = float(name[1:])
+        except ValueError:
+            q = None
+        if q is not None and 0 <= q <= 100:
+            return "percentile", q
+    raise ExpressionError(f"Unknown reduction '{name}', expected one of: {', '.join(REDUCTIONS)} or p0-p100")
+
+
+def evaluate_batch(expressions, variables=None, reductions=None):
+    """
+    Evaluates expressions against shared variables. Each result holds the value, the
+    elements that failed (e.g. division by zero) and the requested reductions of
+    array values; an expression that cannot be evaluated gets an error instead.
+    """
+    reductions = [(name, _parse_reduction(name)) for name in (reductions or [])]
+    # NumPy only pays off for long arrays, and only keeps results exact when every number fits float64
+    use_numpy = np is not None and any(
+        isinstance(value, list) and len(value) >= NUMPY_MIN_SIZE for value in (variables or {}).values()
+    )
+    if use_numpy:
+        use_numpy = all(
+            _fits_float(value) for value in (variables or {}).values() if type(value) in (int, float, list)
+        )
+    prepared = _prepare_variables(variables, use_numpy)
+    results = []
+    for expression in expressions:
+        state = _Evaluation(use_numpy)
+        try:
+            value = compile_expression(expression)(state, prepared)
+        except ExpressionError as e:
+            results.append({"expression": expression, "error": str(e)})
+            continue
+        except (OverflowError, RecursionError, MemoryError):
+            # Anything that slipped past the size bounds (e.g. a huge integer literal
+            # converted for NumPy) still only fails this expression
+            results.append({"expression": expression, "error": "Overflow"})
+            continue
+        result = {"expression": expression, "value": _to_output(value)}
+        if state.errors:
+            failed = sorted(state.errors.items())
+            result["errors"] = [{"index": index, "error": error} for index, error in failed[:MAX_REPORTED_ERRORS]]
+            result["error_count"] = len(failed)
+        if _is_array(value) and reductions:
+            summary = {}
+            for label, (name, q) in reductions:
+                try:
+                    summary[label] = _to_output(reduce_values(value, name, q))
+                except ExpressionError as e:
+                    summary[label] = None
+                    result.setdefault("reduction_errors", {})[label] = str(e)
+            result["reductions"] = summary
+        results.append(result)
+    return results